@@ -0,0 +1 @@
+"""Benchmarks for the PDF Box Eraser hot paths."""
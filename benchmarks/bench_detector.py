@@ -0,0 +1,95 @@
+"""Micro-benchmark for the BoxDetector prefilter and the rewriter on adversarial streams.
+
+Run with ``python -m benchmarks.bench_detector``. Each adversarial stream is
+timed at several sizes up to 50 MB; the run fails if time grows faster than
+linearly with size (allowing for measurement noise).
+"""
+import sys
+import time
+import argparse
+from typing import Callable, Dict
+
+from pdf_box_eraser.core.box_remover import BoxDetector
+from pdf_box_eraser.core.content_stream import ContentStreamRewriter
+
+MB = 1024 * 1024
+
+# Inputs that made the old lazy-dot patterns backtrack, plus cases that
+# stress the ``re`` candidate check itself. None of them contain a box.
+ADVERSARIAL: Dict[str, Callable[[int], bytes]] = {
+    "many_q": lambda size: b"q " * (size // 2),
+    "many_bt": lambda size: b"BT " * (size // 3),
+    "re_no_paint": lambda size: b"1 re " * (size // 5),
+    "re_long_whitespace": lambda size: (b"1 re" + b" " * 4096 + b"x") * (size // 4101),
+    "bare_re": lambda size: b"re" * (size // 2),
+}
+
+# Inputs that pass the prefilter and make the rewriter work per ``re``
+REWRITE_ADVERSARIAL: Dict[str, Callable[[int], bytes]] = {
+    # A long rectangle run whose path is not removable, then one real box
+    "unpainted_rect_run": lambda size: (
+        b"0 0 1 1 re " * (size // 11) + b"5 5 m 6 6 l S 0 0 9 9 re f"
+    ),
+}
+
+SIZES_MB = (5, 25, 50)
+SLACK = 2.0
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    """Return the fastest of ``repeat`` timings of ``func``."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def check_linear(name: str, build: Callable[[int], bytes], run: Callable[[bytes], object],
+                 repeat: int) -> bool:
+    """Time ``run`` on ``build`` at every size; return False if it scales worse than linearly."""
+    timings = {}
+    for size_mb in SIZES_MB:
+        content = build(size_mb * MB)
+        timings[size_mb] = best_of(lambda content=content: run(content), repeat)
+
+    base = SIZES_MB[0]
+    for size_mb, seconds in timings.items():
+        print(f"{name:<20} {size_mb:>3} MB  {seconds * 1000:9.2f} ms  "
+              f"{size_mb / max(seconds, 1e-9):9.1f} MB/s")
+
+    # Linear scaling: 10x the input may cost at most SLACK * 10x the time
+    largest = SIZES_MB[-1]
+    ratio = timings[largest] / max(timings[base], 1e-6)
+    bound = SLACK * largest / base
+    if ratio > bound:
+        print(f"{name}: time grew {ratio:.1f}x for {largest // base}x input (bound {bound:.0f}x)")
+        return False
+    return True
+
+
+def main(argv=None) -> int:
+    """Run the benchmark and return a process exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="timings per case")
+    args = parser.parse_args(argv)
+
+    detector = BoxDetector()
+    rewriter = ContentStreamRewriter()
+    failed = False
+
+    for name, build in ADVERSARIAL.items():
+        assert not detector.has_boxes(build(MB)), name
+        if not check_linear(name, build, detector.has_boxes, args.repeat):
+            failed = True
+
+    for name, build in REWRITE_ADVERSARIAL.items():
+        if not check_linear(name, build, rewriter.find_spans, args.repeat):
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Benchmark page throughput under different garbage collection policies.
+
+Run with ``python -m benchmarks.bench_gc``. A synthetic document is processed
+once with a policy that collects after every page (the previous behavior) and
+once with the default threshold-based policy.
+"""
+import sys
+import time
+import tempfile
+import argparse
+from pathlib import Path
+
+from benchmarks.generators import DocumentSpec, build_document
+from pdf_box_eraser.core.pdf_processor import PDFProcessor
+from pdf_box_eraser.utils.memory import GCPolicy
+
+
+def run(path: Path, policy: GCPolicy) -> dict:
+    """Process ``path`` with ``policy`` and return throughput figures."""
+    processor = PDFProcessor(gc_policy=policy)
+    start = time.perf_counter()
+    processor.process_pdf(str(path)).close()
+    seconds = time.perf_counter() - start
+    pages = processor.box_remover.stats.pages_processed + processor.box_remover.stats.pages_skipped
+    return {"seconds": seconds, "pages_per_second": pages / seconds, **policy.report()}
+
+
+def main(argv=None) -> int:
+    """Run the benchmark and print one line per policy."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=1000, help="pages in the synthetic document")
+    args = parser.parse_args(argv)
+
+    policies = {
+        "every_page": lambda: GCPolicy(rss_threshold_mb=None, allocation_threshold=0),
+        "threshold": GCPolicy,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "bench_gc.pdf"
+        build_document(path, DocumentSpec("gc", pages=args.pages, boxes_per_page=200, stream_kb=8))
+        for name, make_policy in policies.items():
+            result = run(path, make_policy())
+            print(
+                f"{name:<12} {result['pages_per_second']:8.1f} pages/s  "
+                f"{result['collections']:5d} collections  {result['gc_seconds']:.3f}s in GC"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
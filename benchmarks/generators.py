@@ -0,0 +1,142 @@
+"""Synthetic PDF generators for the benchmarks.
+
+Documents are described by a ``DocumentSpec`` and written with pikepdf, so
+every benchmark input can be rebuilt from its parameters alone.
+"""
+import random
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Union
+
+import pikepdf
+
+# Text operators used to pad content streams to a target size
+_FILLER = b"BT /F1 9 Tf 72 %d Td (Lorem ipsum dolor sit amet %d) Tj ET\n"
+
+
+@dataclass
+class DocumentSpec:
+    """Parameters of one synthetic document."""
+    name: str
+    pages: int = 10
+    boxes_per_page: int = 20
+    stream_kb: int = 4
+    shared_forms: int = 1
+    nesting_depth: int = 0
+    smask_states: int = 0
+    adversarial: bool = False
+    seed: int = 0
+
+    def to_dict(self) -> Dict[str, Union[str, int, bool]]:
+        """Plain dictionary form for JSON reports."""
+        return asdict(self)
+
+
+def box_operators(count: int, rng: random.Random) -> bytes:
+    """Rectangle paths in the mix of paint operators seen in real files."""
+    painters = (b"S", b"f", b"B", b"n", b"W n")
+    return b"".join(
+        b"%d %d %d %d re %s\n" % (
+            rng.randrange(0, 500), rng.randrange(0, 700),
+            rng.randrange(5, 100), rng.randrange(5, 60),
+            painters[i % len(painters)],
+        )
+        for i in range(count)
+    )
+
+
+def filler(size: int, seed: int = 0) -> bytes:
+    """Text-only content of roughly ``size`` bytes that contains no boxes."""
+    chunks: List[bytes] = []
+    total = 0
+    line = 0
+    while total < size:
+        chunk = _FILLER % (700 - line % 600, seed + line)
+        chunks.append(chunk)
+        total += len(chunk)
+        line += 1
+    return b"".join(chunks)
+
+
+def adversarial_content(size: int) -> bytes:
+    """Content full of near misses for the box scanner but with no boxes."""
+    unit = b"1 re (re S) Tj % 0 0 1 1 re f\n/re0 gs q Q "
+    return unit * max(1, size // len(unit))
+
+
+def content_stream(spec: DocumentSpec, page_num: int, rng: random.Random) -> bytes:
+    """Build the page content stream for ``spec``."""
+    size = spec.stream_kb * 1024
+    if spec.adversarial:
+        return adversarial_content(size)
+
+    boxes = box_operators(spec.boxes_per_page, rng)
+    body = filler(max(0, size - len(boxes)), page_num)
+    # Spread the boxes through the text so the scanner sees both
+    middle = len(body) // 2
+    while middle < len(body) and body[middle - 1:middle] != b"\n":
+        middle += 1
+    return body[:middle] + boxes + body[middle:]
+
+
+def _form(pdf: pikepdf.Pdf, content: bytes, resources: pikepdf.Dictionary = None) -> pikepdf.Stream:
+    """Make a Form XObject stream."""
+    form = pdf.make_stream(
+        content,
+        Type=pikepdf.Name.XObject,
+        Subtype=pikepdf.Name.Form,
+        BBox=[0, 0, 612, 792],
+    )
+    if resources is not None:
+        form.Resources = resources
+    return form
+
+
+def build_resources(pdf: pikepdf.Pdf, spec: DocumentSpec, rng: random.Random) -> pikepdf.Dictionary:
+    """Shared forms (optionally nested) and SMask ExtGStates for every page."""
+    xobjects = pikepdf.Dictionary()
+    for index in range(spec.shared_forms):
+        form = _form(pdf, box_operators(4, rng) + b"0 0 m 100 100 l S")
+        # Wrap the form ``nesting_depth`` times, each level drawing the previous
+        for _ in range(spec.nesting_depth):
+            form = _form(
+                pdf,
+                box_operators(2, rng) + b"/Fm0 Do",
+                pikepdf.Dictionary(XObject=pikepdf.Dictionary(Fm0=form)),
+            )
+        xobjects[f"/Fm{index}"] = pdf.make_indirect(form)
+
+    gstates = pikepdf.Dictionary()
+    for index in range(spec.smask_states):
+        group = _form(pdf, box_operators(3, rng) + b"0 g 0 0 612 792 re f")
+        group.Group = pikepdf.Dictionary(S=pikepdf.Name.Transparency, CS=pikepdf.Name.DeviceGray)
+        gstates[f"/GS{index}"] = pdf.make_indirect(
+            pikepdf.Dictionary(
+                Type=pikepdf.Name.ExtGState,
+                SMask=pikepdf.Dictionary(S=pikepdf.Name.Luminosity, G=group),
+            )
+        )
+
+    return pdf.make_indirect(pikepdf.Dictionary(XObject=xobjects, ExtGState=gstates))
+
+
+def build_document(path: Union[str, Path], spec: DocumentSpec) -> Path:
+    """Write the document described by ``spec`` to ``path``."""
+    rng = random.Random(spec.seed)
+    pdf = pikepdf.new()
+    resources = build_resources(pdf, spec, rng)
+
+    uses = b"".join(b"/Fm%d Do\n" % index for index in range(spec.shared_forms))
+    uses += b"".join(b"/GS%d gs\n" % index for index in range(spec.smask_states))
+    for page_num in range(spec.pages):
+        content = b"q\n" + uses + content_stream(spec, page_num, rng) + b"Q\n"
+        page = pikepdf.Dictionary(
+            Type=pikepdf.Name.Page,
+            MediaBox=[0, 0, 612, 792],
+            Resources=resources,
+            Contents=pdf.make_stream(content),
+        )
+        pdf.pages.append(pikepdf.Page(page))
+
+    pdf.save(path)
+    return Path(path)
@@ -0,0 +1,174 @@
+"""Benchmark suite covering every hot path, with JSON output.
+
+Run with ``python -m benchmarks`` (add ``--output results.json`` to keep the
+report). Each case builds a synthetic document from a ``DocumentSpec`` and
+times detection, rewriting, page processing, end-to-end processing, saving
+and preview rendering on it. Reports from different versions can be diffed
+case by case to spot regressions.
+"""
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import pikepdf
+
+from benchmarks.bench_detector import best_of
+from benchmarks.generators import DocumentSpec, build_document
+from pdf_box_eraser.core.box_remover import BoxDetector, BoxRemover
+from pdf_box_eraser.core.pdf_processor import PDFProcessor
+from pdf_box_eraser.ui.preview import PreviewRenderer
+
+CASES: List[DocumentSpec] = [
+    DocumentSpec("small", pages=10),
+    DocumentSpec("many_pages", pages=500, boxes_per_page=5, stream_kb=2),
+    DocumentSpec("large_streams", pages=20, boxes_per_page=200, stream_kb=512),
+    DocumentSpec("dense_boxes", pages=50, boxes_per_page=2000, stream_kb=64),
+    DocumentSpec("no_boxes", pages=100, boxes_per_page=0, stream_kb=16),
+    DocumentSpec("shared_forms", pages=200, boxes_per_page=5, shared_forms=20),
+    DocumentSpec("nested_forms", pages=50, shared_forms=5, nesting_depth=8),
+    DocumentSpec("smask_heavy", pages=50, smask_states=30),
+    DocumentSpec("adversarial", pages=20, stream_kb=1024, adversarial=True),
+]
+
+QUICK = {"small", "shared_forms", "adversarial"}
+
+
+def page_streams(path: Path) -> List[bytes]:
+    """Decoded page content streams of a document."""
+    with pikepdf.open(path) as pdf:
+        return [page.Contents.read_bytes() for page in pdf.pages]
+
+
+def bench_detector(streams: List[bytes], repeat: int) -> float:
+    """Time ``BoxDetector.has_boxes`` over every page stream."""
+    detector = BoxDetector()
+    return best_of(lambda: [detector.has_boxes(content) for content in streams], repeat)
+
+
+def bench_rewrite(streams: List[bytes], repeat: int) -> float:
+    """Time ``remove_boxes_from_content`` over every page stream."""
+    remover = BoxRemover()
+    return best_of(lambda: [remover.remove_boxes_from_content(content) for content in streams], repeat)
+
+
+def bench_process_page(path: Path, repeat: int) -> float:
+    """Time ``process_page`` over every page of a freshly opened document."""
+    timings = []
+    for _ in range(repeat):
+        with pikepdf.open(path) as pdf:
+            remover = BoxRemover()
+            start = time.perf_counter()
+            for page_num, page in enumerate(pdf.pages, 1):
+                remover.process_page(page, page_num)
+            timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_end_to_end(path: Path, repeat: int) -> Dict[str, float]:
+    """Time ``process_pdf`` and then ``save_pdf`` on its result."""
+    process_times = []
+    save_times = []
+    for _ in range(repeat):
+        processor = PDFProcessor()
+        start = time.perf_counter()
+        pdf = processor.process_pdf(str(path))
+        process_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        processor.save_pdf(pdf, io.BytesIO())
+        save_times.append(time.perf_counter() - start)
+        pdf.close()
+    return {"process_pdf": min(process_times), "save": min(save_times)}
+
+
+def bench_render(path: Path, pages: int) -> float:
+    """Time previewing the first ``pages`` pages the way the UI does."""
+    renderer = PreviewRenderer(dpi=72, max_pages=pages)
+    start = time.perf_counter()
+    try:
+        renderer.prefetch(str(path), range(1, pages + 1))
+        for page in range(1, pages + 1):
+            renderer.get(str(path), page)
+    finally:
+        renderer.shutdown()
+    return time.perf_counter() - start
+
+
+def run_case(spec: DocumentSpec, tmp_dir: Path, repeat: int, render: bool) -> Dict:
+    """Build one document and run every benchmark on it."""
+    path = build_document(tmp_dir / f"{spec.name}.pdf", spec)
+    streams = page_streams(path)
+    stream_bytes = sum(len(content) for content in streams)
+
+    seconds = {
+        "has_boxes": bench_detector(streams, repeat),
+        "remove_boxes_from_content": bench_rewrite(streams, repeat),
+        "process_page": bench_process_page(path, repeat),
+        **bench_end_to_end(path, repeat),
+    }
+    if render:
+        try:
+            seconds["render_preview"] = bench_render(path, min(spec.pages, 5))
+        except Exception as e:
+            print(f"{spec.name}: skipping render benchmark ({e})", file=sys.stderr)
+
+    return {
+        "spec": spec.to_dict(),
+        "file_bytes": path.stat().st_size,
+        "stream_bytes": stream_bytes,
+        "seconds": {name: round(value, 6) for name, value in seconds.items()},
+        "pages_per_second": round(spec.pages / seconds["process_pdf"], 2),
+        "stream_mb_per_second": round(stream_bytes / (1024 * 1024) / seconds["has_boxes"], 2),
+    }
+
+
+def environment() -> Dict[str, str]:
+    """Versions that affect the timings."""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "pikepdf": pikepdf.__version__,
+        "pattern_version": BoxRemover.PATTERN_VERSION,
+    }
+
+
+def main(argv=None) -> int:
+    """Run the suite and write the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="timings per measurement")
+    parser.add_argument("--quick", action="store_true", help="run only a few small cases")
+    parser.add_argument("--case", action="append", help="run only the named case (repeatable)")
+    parser.add_argument("--no-render", action="store_true", help="skip the poppler benchmark")
+    parser.add_argument("-o", "--output", type=Path, help="write the report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    cases = CASES
+    if args.case:
+        cases = [spec for spec in cases if spec.name in args.case]
+    elif args.quick:
+        cases = [spec for spec in cases if spec.name in QUICK]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for spec in cases:
+            print(f"Running {spec.name}...", file=sys.stderr)
+            results[spec.name] = run_case(spec, Path(tmp_dir), args.repeat, not args.no_render)
+
+    report = {"created": time.time(), "environment": environment(), "cases": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,82 @@
 """Logging configuration for the PDF Box Eraser application."""
+import atexit
 import logging
+import logging.handlers
+import multiprocessing
 import os
 from pathlib import Path
+from typing import Optional, Union
+
+# Profiles: "production" logs at INFO through a background queue listener,
+# "development" logs everything at DEBUG directly from the calling thread.
+DEFAULT_PROFILE = "production"
+PROFILE_LEVELS = {
+    "production": logging.INFO,
+    "development": logging.DEBUG,
+}
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(
+    level: Union[int, str, None] = None,
+    profile: Optional[str] = None,
+    log_file: Optional[str] = None,
+):
+    """Set up logging configuration for the application.
+
+    ``profile`` and ``level`` default to the ``PDF_BOX_ERASER_LOG_PROFILE``
+    and ``PDF_BOX_ERASER_LOG_LEVEL`` environment variables. In the
+    production profile records are queued and the console and file
+    handlers run on a ``QueueListener`` thread, so processing threads never
+    wait on I/O; the message itself is still formatted by the caller. The
+    queue is a ``multiprocessing`` queue, so worker processes forked from
+    this one (such as the job queue's) log through the same listener.
+    Calling this again (e.g. on a Streamlit rerun) keeps the first setup.
+    """
+    global _listener
+
+    root = logging.getLogger()
+    if _listener is not None or root.handlers:
+        return logging.getLogger(__name__)
 
-def setup_logging():
-    """Set up logging configuration for the application."""
     project_root = Path(__file__).parent.parent
-    
-    # Configure logging
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler(os.path.join(project_root, 'pdf_box_eraser.log'))
-        ]
+    profile = profile or os.environ.get("PDF_BOX_ERASER_LOG_PROFILE", DEFAULT_PROFILE)
+    if profile not in PROFILE_LEVELS:
+        raise ValueError(f"Unknown logging profile: {profile}")
+    level = level or os.environ.get("PDF_BOX_ERASER_LOG_LEVEL") or PROFILE_LEVELS[profile]
+    if isinstance(level, str):
+        level = level.upper()
+    log_file = log_file or os.environ.get(
+        "PDF_BOX_ERASER_LOG_FILE", os.path.join(project_root, 'pdf_box_eraser.log')
     )
-    
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler(), logging.FileHandler(log_file)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    root.setLevel(level)
+    if profile == "development":
+        for handler in handlers:
+            root.addHandler(handler)
+    else:
+        log_queue = multiprocessing.Queue()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(stop_logging)
+
     return logging.getLogger(__name__)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the background listener."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,5 @@
+"""Run the batch command line with ``python -m pdf_box_eraser``."""
+import sys
+from pdf_box_eraser.cli import main
+
+sys.exit(main())
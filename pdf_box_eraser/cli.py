@@ -0,0 +1,363 @@
+"""Headless batch command line for PDF Box Eraser.
+
+Console entry point: ``pdf_box_eraser.cli:main`` (also ``python -m pdf_box_eraser``).
+Only the core package is imported here, never Streamlit.
+"""
+import os
+import sys
+import glob
+import time
+import logging
+import argparse
+from pathlib import Path
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+from pdf_box_eraser.core.pdf_processor import PDFProcessor
+from pdf_box_eraser.core.stream_cache import StreamCache
+from pdf_box_eraser.core.geometry import MARGIN_MODES, RectFilter
+from pdf_box_eraser.core.spatial import REGION_MODES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SUFFIX = "_processed"
+
+
+@dataclass
+class FileResult:
+    """Outcome of processing one input file."""
+    input_path: str
+    output_path: str
+    pages: int = 0
+    boxes_removed: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def pages_per_second(self) -> float:
+        """Page throughput for this file."""
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        """Input throughput for this file in MB/s."""
+        return self.bytes_in / (1024 * 1024) / self.seconds if self.seconds else 0.0
+
+
+def collect_inputs(inputs: Iterable[str]) -> List[Tuple[Path, Path]]:
+    """Expand files, directories and globs into ``(pdf_path, root)`` pairs.
+
+    ``root`` is the directory the path is relative to in a mirrored output
+    tree: the directory argument itself, the part of a glob before its
+    first wildcard, or the file's parent otherwise.
+    """
+    found: Dict[Path, Path] = {}
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            for pdf_path in sorted(path.rglob("*")):
+                if pdf_path.is_file() and pdf_path.suffix.lower() == ".pdf":
+                    found.setdefault(pdf_path.resolve(), path.resolve())
+            continue
+
+        matches = [Path(match) for match in sorted(glob.glob(item, recursive=True))]
+        if not matches:
+            logger.warning(f"No input matches {item}")
+        prefix = glob_root(item)
+        for match in matches:
+            if match.is_file():
+                root = prefix.resolve() if prefix is not None else match.resolve().parent
+                found.setdefault(match.resolve(), root)
+    return list(found.items())
+
+
+def glob_root(pattern: str) -> Optional[Path]:
+    """The directories of a glob before its first wildcard, or None for a plain path."""
+    parts = Path(pattern).parts
+    for number, part in enumerate(parts):
+        if glob.has_magic(part):
+            return Path(*parts[:number]) if number else Path(".")
+    return None
+
+
+def output_path_for(pdf_path: Path, root: Path, output_dir: Optional[Path], suffix: str) -> Path:
+    """Place the output next to the input, or at the same spot in a mirror tree."""
+    name = f"{pdf_path.stem}{suffix}{pdf_path.suffix}"
+    if output_dir is None:
+        return pdf_path.with_name(name)
+    return output_dir / pdf_path.relative_to(root).with_name(name)
+
+
+def metrics_path_for(
+    output_path: str, base: Path, metrics_dir: Optional[Path], fmt: str
+) -> Optional[str]:
+    """Name the metrics file for an output, or None when metrics are off.
+
+    The output's path below ``base``, the directory all outputs share, is
+    mirrored under ``metrics_dir`` so outputs with the same name in
+    different directories get their own metrics files.
+    """
+    if metrics_dir is None:
+        return None
+    suffix = ".prom" if fmt == "prometheus" else ".metrics.json"
+    relative = Path(output_path).resolve().relative_to(base)
+    path = metrics_dir / relative.with_name(f"{relative.stem}{suffix}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return str(path)
+
+
+def rect_filter_from_args(args: argparse.Namespace) -> Optional[RectFilter]:
+    """Build the geometry filter from the command line, or None when unused."""
+    limits = dict(
+        min_area=args.min_area,
+        max_area=args.max_area,
+        min_aspect=args.min_aspect,
+        max_aspect=args.max_aspect,
+        margin=args.margin,
+        regions=args.regions,
+    )
+    if all(value is None for value in limits.values()) and not args.stroke_only:
+        return None
+    return RectFilter(
+        **limits,
+        margin_mode=args.margin_mode,
+        stroke_only=args.stroke_only,
+        region_mode=args.region_mode,
+    )
+
+
+def parse_region(text: str) -> Tuple[float, float, float, float]:
+    """Parse ``x0,y0,x1,y1`` into a region box."""
+    try:
+        x0, y0, x1, y1 = (float(v) for v in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected x0,y0,x1,y1, got {text!r}")
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+
+def process_file(
+    input_path: str,
+    output_path: str,
+    workers: int = 1,
+    cache_dir: Optional[str] = None,
+    object_streams: str = "preserve",
+    linearize: bool = False,
+    incremental: bool = False,
+    metrics_path: Optional[str] = None,
+    patterns: Optional[List[str]] = None,
+    rect_filter: Optional[RectFilter] = None,
+) -> FileResult:
+    """Process a single PDF into ``output_path`` and time it."""
+    result = FileResult(input_path, output_path)
+    start = time.perf_counter()
+    try:
+        stream_cache = StreamCache(cache_dir) if cache_dir else None
+        processor = PDFProcessor(
+            workers=workers,
+            stream_cache=stream_cache,
+            metrics_path=metrics_path,
+            patterns=patterns,
+            rect_filter=rect_filter,
+        )
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        processor.process_pdf_to_stream(
+            input_path,
+            output_path,
+            object_streams=object_streams,
+            linearize=linearize,
+            incremental=incremental,
+        )
+        stats = processor.box_remover.stats
+        result.pages = stats.pages_processed + stats.pages_skipped
+        result.boxes_removed = stats.boxes_removed
+        result.bytes_in = os.path.getsize(input_path)
+        result.bytes_out = os.path.getsize(output_path)
+    except Exception as e:
+        result.error = str(e)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def print_summary(results: List[FileResult], elapsed: float) -> None:
+    """Print per-file throughput and a batch total."""
+    for result in results:
+        if result.error:
+            print(f"FAILED  {result.input_path}: {result.error}")
+            continue
+        print(
+            f"ok      {result.input_path} -> {result.output_path}  "
+            f"{result.pages} pages, {result.boxes_removed} boxes, "
+            f"{result.seconds:.2f}s ({result.pages_per_second:.1f} pages/s, "
+            f"{result.megabytes_per_second:.1f} MB/s)"
+        )
+
+    succeeded = [result for result in results if not result.error]
+    pages = sum(result.pages for result in succeeded)
+    print(
+        f"{len(succeeded)}/{len(results)} files, {pages} pages in {elapsed:.2f}s "
+        f"({pages / elapsed if elapsed else 0.0:.1f} pages/s)"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for the batch command."""
+    parser = argparse.ArgumentParser(
+        prog="pdf-box-eraser",
+        description="Remove rectangular boxes from PDF files in batch.",
+    )
+    parser.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument(
+        "-o", "--output-dir", type=Path,
+        help="write outputs into a mirror tree here instead of next to the inputs",
+    )
+    parser.add_argument(
+        "--suffix", default=DEFAULT_SUFFIX,
+        help=f"appended to output file names (default: {DEFAULT_SUFFIX})",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1,
+        help="worker processes (default: number of CPUs)",
+    )
+    parser.add_argument("--cache-dir", help="directory for the rewritten-stream cache")
+    parser.add_argument(
+        "--object-streams", choices=("preserve", "disable", "generate"), default="preserve",
+        help="object stream handling when saving (default: preserve)",
+    )
+    parser.add_argument("--linearize", action="store_true", help="write linearized PDFs")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="append only the rewritten streams to a copy of each input",
+    )
+    parser.add_argument(
+        "--pattern", action="append", dest="patterns", metavar="REGEX",
+        help="extra regex whose matches are removed from content streams (repeatable)",
+    )
+    geometry = parser.add_argument_group(
+        "rectangle filter", "remove only rectangles matching all given limits (sizes in points)"
+    )
+    geometry.add_argument("--min-area", type=float, help="smallest area to remove")
+    geometry.add_argument("--max-area", type=float, help="largest area to remove")
+    geometry.add_argument("--min-aspect", type=float, help="smallest long/short side ratio")
+    geometry.add_argument("--max-aspect", type=float, help="largest long/short side ratio")
+    geometry.add_argument("--margin", type=float, help="distance from the page edges")
+    geometry.add_argument(
+        "--margin-mode", choices=MARGIN_MODES, default="exclude",
+        help="keep rectangles within --margin of an edge, or remove only those (default: exclude)",
+    )
+    geometry.add_argument(
+        "--stroke-only", action="store_true", help="remove only stroked outlines, not fills",
+    )
+    geometry.add_argument(
+        "--region", action="append", dest="regions", type=parse_region, metavar="X0,Y0,X1,Y1",
+        help="remove only rectangles in this page region (repeatable)",
+    )
+    geometry.add_argument(
+        "--region-mode", choices=REGION_MODES, default="intersect",
+        help="rectangles touching a region, or only those fully inside (default: intersect)",
+    )
+    parser.add_argument(
+        "--metrics-dir", type=Path,
+        help="write per-file stage timings here, mirroring the output tree "
+        "(<output>.metrics.json or .prom)",
+    )
+    parser.add_argument(
+        "--metrics-format", choices=("json", "prometheus"), default="json",
+        help="format of the metrics files (default: json)",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="log progress details")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the batch command and return a process exit code."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.incremental and args.linearize:
+        parser.error("--incremental cannot be combined with --linearize")
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    )
+
+    inputs = collect_inputs(args.inputs)
+    if args.suffix:
+        # Do not pick up outputs of an earlier run as new inputs
+        inputs = [(path, root) for path, root in inputs if not path.stem.endswith(args.suffix)]
+    if not inputs:
+        print("No PDF files found", file=sys.stderr)
+        return 2
+
+    jobs = [
+        (str(pdf_path), str(output_path_for(pdf_path, root, args.output_dir, args.suffix)))
+        for pdf_path, root in inputs
+    ]
+    overwriting = [
+        input_path for input_path, output_path in jobs
+        if Path(output_path).resolve() == Path(input_path).resolve()
+    ]
+    if overwriting:
+        print(
+            f"Refusing to overwrite {len(overwriting)} input file(s), e.g. {overwriting[0]}; "
+            "use a non-empty --suffix or --output-dir",
+            file=sys.stderr,
+        )
+        return 2
+    claimed: Dict[Path, str] = {}
+    for input_path, output_path in jobs:
+        other = claimed.setdefault(Path(output_path).resolve(), input_path)
+        if other != input_path:
+            print(
+                f"{other} and {input_path} would both be written to {output_path}; "
+                "pass their common parent directory instead",
+                file=sys.stderr,
+            )
+            return 2
+    metrics_base = Path(os.path.commonpath(
+        [str(Path(output_path).resolve().parent) for _, output_path in jobs]
+    ))
+    options = dict(
+        cache_dir=args.cache_dir,
+        object_streams=args.object_streams,
+        linearize=args.linearize,
+        incremental=args.incremental,
+        patterns=args.patterns,
+        rect_filter=rect_filter_from_args(args),
+    )
+
+    start = time.perf_counter()
+    if len(jobs) == 1:
+        # A single document gets the whole pool through page sharding
+        results = [
+            process_file(
+                *jobs[0], workers=args.jobs,
+                metrics_path=metrics_path_for(
+                    jobs[0][1], metrics_base, args.metrics_dir, args.metrics_format
+                ),
+                **options
+            )
+        ]
+    else:
+        results = []
+        with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+            futures = [
+                executor.submit(
+                    process_file, *job,
+                    metrics_path=metrics_path_for(
+                        job[1], metrics_base, args.metrics_dir, args.metrics_format
+                    ),
+                    **options
+                )
+                for job in jobs
+            ]
+            for future in as_completed(futures):
+                results.append(future.result())
+        results.sort(key=lambda result: result.input_path)
+
+    print_summary(results, time.perf_counter() - start)
+    return 1 if any(result.error for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
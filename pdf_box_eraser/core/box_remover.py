@@ -2,15 +2,44 @@
 
 import pikepdf
 import logging
+import numpy as np
 import re
-import gc
-from typing import Set, Dict, Union, Optional, List, Pattern
-from dataclasses import dataclass
+import hashlib
+from typing import Set, Dict, FrozenSet, Union, Optional, List, Pattern, Sequence, Tuple, Iterable
+from dataclasses import dataclass, field
+from enum import IntEnum
 from abc import ABC, abstractmethod
 from pdf_box_eraser.utils.decorators import log_exceptions
+from pdf_box_eraser.utils.memory import GCPolicy
+from pdf_box_eraser.utils.instrumentation import Instrumentation, NullInstrumentation
+from pdf_box_eraser.core.content_stream import (
+    BytesLike,
+    ContentStreamRewriter,
+    Span,
+    apply_spans,
+    count_disjoint,
+    has_painted_rect,
+    merge_spans,
+)
+from pdf_box_eraser.core.geometry import (
+    IDENTITY,
+    Placement,
+    RectFilter,
+    collect_rects,
+    drawn_names,
+    removal_spans,
+    select,
+    walk_graphics_state,
+)
+from pdf_box_eraser.core.spatial import GridIndex, PageRectIndex
+from pdf_box_eraser.core.stream_index import PlacementIndex, StreamIndex
+from pdf_box_eraser.core.stream_cache import CachedStream, StreamCache
 
 logger = logging.getLogger(__name__)
 
+# A stream cache key with its entry, or None on a miss
+CacheLookup = Tuple[str, Optional[CachedStream]]
+
 @dataclass
 class ProcessingStats:
     """Statistics for PDF processing."""
@@ -19,6 +48,8 @@ class ProcessingStats:
     boxes_removed: int = 0
     objects_processed: int = 0
     quick_matches: int = 0
+    cache_hits: int = 0
+    pattern_hits: Dict[str, int] = field(default_factory=dict)
 
     def reset(self):
         """Reset all statistics to zero."""
@@ -27,22 +58,95 @@ class ProcessingStats:
         self.boxes_removed = 0
         self.objects_processed = 0
         self.quick_matches = 0
+        self.cache_hits = 0
+        self.pattern_hits.clear()
+
+    def merge(self, other: "ProcessingStats"):
+        """Add the counts from another statistics object."""
+        self.pages_processed += other.pages_processed
+        self.pages_skipped += other.pages_skipped
+        self.boxes_removed += other.boxes_removed
+        self.objects_processed += other.objects_processed
+        self.quick_matches += other.quick_matches
+        self.cache_hits += other.cache_hits
+        for name, hits in other.pattern_hits.items():
+            self.pattern_hits[name] = self.pattern_hits.get(name, 0) + hits
 
-class PDFObjectIdentifier:
-    """Handles unique identification of PDF objects."""
-    
-    @staticmethod
-    def get_object_id(obj: pikepdf.Object, prefix: str = "") -> str:
-        """Get a unique identifier for a PDF object."""
-        try:
-            if hasattr(obj, "objgen"):
-                return f"{prefix}{obj.objgen[0]}_{obj.objgen[1]}"
+@dataclass
+class RemovalResult:
+    """Outcome of box removal on one content stream.
+
+    ``spans`` are the removed byte ranges of the input, sorted and merged;
+    ``content`` is the input object itself when nothing was removed.
+    ``hits`` counts the removals per pattern name.
+    """
+    content: BytesLike
+    boxes: int = 0
+    spans: List[Span] = field(default_factory=list)
+    hits: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> bool:
+        """Whether anything was removed."""
+        return bool(self.spans)
+
+class ObjectKind(IntEnum):
+    """Kinds of objects tracked by the processed-object registry."""
+    PAGE = 0
+    STREAM = 1
+
+class ProcessedObjectRegistry:
+    """Tracks processed PDF objects with compact integer keys.
+
+    Indirect objects are keyed by their objgen packed into a single int
+    (``objnum << 16 | gen``), with one set per kind. Direct objects have no
+    objgen and are keyed by identity; they are kept referenced so their ids
+    cannot be reused while the registry is alive.
+    """
 
-            content = obj.read_bytes() if isinstance(obj, pikepdf.Stream) else str(obj)
-            return f"{prefix}{type(obj).__name__}_{hash(content)}"
-        except Exception as e:
-            logger.error(f"Failed to get object ID: {e}")
-            return f"{prefix}{id(obj)}"
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._seen: List[Set[int]] = [set() for _ in ObjectKind]
+        self._direct: List[pikepdf.Object] = []
+
+    @staticmethod
+    def key(obj: pikepdf.Object) -> int:
+        """Get the packed objgen of an object, or 0 for a direct object."""
+        objnum, gen = obj.objgen
+        return (objnum << 16) | gen if objnum else 0
+
+    def seen(self, kind: ObjectKind, obj: pikepdf.Object) -> bool:
+        """Check whether ``obj`` was already recorded under ``kind``."""
+        key = self.key(obj)
+        return (key or -id(obj)) in self._seen[kind]
+
+    def add(self, kind: ObjectKind, obj: pikepdf.Object) -> bool:
+        """Record ``obj`` under ``kind``; return False if it was already there."""
+        key = self.key(obj)
+        if not key:
+            key = -id(obj)
+        seen = self._seen[kind]
+        if key in seen:
+            return False
+        seen.add(key)
+        if key < 0:
+            self._direct.append(obj)
+        return True
+
+    def discard(self, kind: ObjectKind, obj: pikepdf.Object) -> None:
+        """Forget ``obj`` under ``kind`` if it was recorded."""
+        key = self.key(obj)
+        self._seen[kind].discard(key or -id(obj))
+
+    def clear(self) -> None:
+        """Forget every recorded object."""
+        for seen in self._seen:
+            seen.clear()
+        self._direct.clear()
+
+    def __len__(self) -> int:
+        """Total number of recorded objects."""
+        return sum(len(seen) for seen in self._seen)
 
 class PDFObjectHelper:
     """Helper class for safe PDF object operations."""
@@ -71,74 +175,228 @@ class PDFObjectHelper:
         """Safely get an item from a PDF dictionary."""
         try:
             if not isinstance(pdf_dict, pikepdf.Dictionary):
-                logger.debug(f"safe_get_dict_item: Not a dictionary, got {type(pdf_dict)}")
+                logger.debug("safe_get_dict_item: Not a dictionary, got %s", type(pdf_dict))
                 return None
 
             if key not in pdf_dict:
-                logger.debug(f"safe_get_dict_item: Key {key} not found in dictionary")
+                logger.debug("safe_get_dict_item: Key %s not found in dictionary", key)
                 return None
 
             item = pdf_dict.get(key)
-            logger.debug(f"safe_get_dict_item: Retrieved item of type {type(item)} for key {key}")
+            logger.debug("safe_get_dict_item: Retrieved item of type %s for key %s", type(item), key)
             return PDFObjectHelper.safe_get_object(item)
         except Exception as e:
-            logger.debug(f"Could not get dictionary item {key}: {str(e)}")
+            logger.debug("Could not get dictionary item %s: %s", key, e)
             return None
 
 class BoxPattern(ABC):
     """Abstract base class for box pattern detection strategies."""
     
     @abstractmethod
-    def matches(self, content: bytes) -> bool:
+    def matches(self, content: BytesLike) -> bool:
         """Check if content matches the pattern."""
         pass
 
     @abstractmethod
-    def remove(self, content: str) -> str:
+    def remove(self, content: BytesLike) -> BytesLike:
         """Remove matching patterns from content."""
         pass
 
 class RegexBoxPattern(BoxPattern):
-    """Box pattern detection using regular expressions."""
+    """Box pattern detection using bytes regular expressions.
+
+    ``str`` patterns are encoded as latin-1 once, at construction, so
+    content is always matched as bytes and never decoded.
+    """
     
-    def __init__(self, pattern: str, is_bytes: bool = False):
-        """Initialize with regex pattern."""
+    def __init__(self, pattern: Union[str, bytes], is_bytes: bool = False):
+        """Initialize with regex pattern.
+
+        ``is_bytes`` is accepted for compatibility; every pattern is
+        compiled as a bytes pattern.
+        """
         self.pattern = pattern
         self.is_bytes = is_bytes
-        self._compiled = re.compile(pattern.encode() if is_bytes else pattern)
+        self._compiled = re.compile(
+            pattern.encode("latin1") if isinstance(pattern, str) else pattern
+        )
 
-    def matches(self, content: bytes) -> bool:
+    def matches(self, content: BytesLike) -> bool:
         """Check if content matches the pattern."""
-        if self.is_bytes:
-            return bool(self._compiled.search(content, re.DOTALL))
-        return bool(self._compiled.search(content.decode("latin1")))
+        return self._compiled.search(content) is not None
+
+    def remove(self, content: BytesLike) -> BytesLike:
+        """Remove matching patterns from content.
+
+        When nothing matches the original object is returned as-is.
+        """
+        result, count = self._compiled.subn(b"", content)
+        return result if count else content
+
+# Inline flags opening a pattern, which only apply globally at the start
+_LEADING_FLAGS = re.compile(rb"\(\?([aiLmsux]+)\)")
+# Syntax that depends on the pattern's own group numbers or names
+_GROUP_REFERENCE = re.compile(rb"\\[1-9]|\(\?P[<=]|\(\?\(")
+# Global flags later in a pattern; Python 3.8 only warns and applies them everywhere
+_INLINE_FLAGS = re.compile(rb"\(\?[aiLmsux]+\)")
+
+
+class PatternSet:
+    """Several box patterns compiled into one alternation.
+
+    Each pattern becomes a named alternative, so a single scan finds every
+    match and ``match.lastgroup`` tells which pattern produced it. Leading
+    inline flags such as ``(?i)`` are scoped to their own alternative.
+    Patterns that refer to their own groups (backreferences, named groups,
+    conditionals) cannot share the numbering of a combined pattern and get
+    a matcher of their own instead. Hits are accumulated per pattern name
+    in ``hits``.
+    """
+
+    def __init__(self, patterns: Sequence[Union[RegexBoxPattern, str, bytes]] = ()):
+        """Initialize the set and compile the combined matcher."""
+        self.names: List[str] = []
+        self.sources: List[bytes] = []
+        self.hits: Dict[str, int] = {}
+        self._compiled: Optional[Pattern[bytes]] = None
+        self._separate: List[Tuple[int, Pattern[bytes]]] = []
+        self.extend(patterns)
+
+    @staticmethod
+    def _source(pattern: Union[RegexBoxPattern, str, bytes]) -> bytes:
+        """Get the bytes regex source of a pattern."""
+        if isinstance(pattern, RegexBoxPattern):
+            pattern = pattern.pattern
+        return pattern.encode("latin1") if isinstance(pattern, str) else pattern
+
+    @staticmethod
+    def _scoped(source: bytes) -> bytes:
+        """Turn leading ``(?flags)`` into a ``(?flags:...)`` group around the rest."""
+        flags = b""
+        match = _LEADING_FLAGS.match(source)
+        while match is not None:
+            flags += match.group(1)
+            source = source[match.end():]
+            match = _LEADING_FLAGS.match(source)
+        if not flags:
+            return source
+        # A verbose-mode comment would otherwise swallow the closing parenthesis
+        tail = b"\n)" if b"x" in flags else b")"
+        return b"(?" + flags + b":" + source + tail
+
+    def add(self, pattern: Union[RegexBoxPattern, str, bytes], name: Optional[str] = None) -> None:
+        """Add a pattern and recompile."""
+        self.extend([pattern], [name] if name else None)
+
+    def extend(
+        self,
+        patterns: Sequence[Union[RegexBoxPattern, str, bytes]],
+        names: Optional[Sequence[str]] = None,
+    ) -> None:
+        """Add several patterns and recompile once."""
+        for index, pattern in enumerate(patterns):
+            source = self._source(pattern)
+            try:
+                compiled = re.compile(source)
+            except re.error as e:
+                raise ValueError(f"Invalid box pattern {source!r}: {e}") from e
+            if source in self.sources:
+                continue
+            name = names[index] if names else f"pattern_{len(self.sources)}"
+            self.sources.append(source)
+            self.names.append(name)
+            self.hits.setdefault(name, 0)
+            if _GROUP_REFERENCE.search(source) or _INLINE_FLAGS.search(self._scoped(source)):
+                logger.debug(f"Box pattern {name} cannot be combined, matching it separately")
+                self._separate.append((len(self.sources) - 1, compiled))
+
+        separate = {index for index, _ in self._separate}
+        merged = [
+            b"(?P<_p%d>%s)" % (index, self._scoped(source))
+            for index, source in enumerate(self.sources)
+            if index not in separate
+        ]
+        self._compiled = re.compile(b"|".join(merged)) if merged else None
+
+    def merge(self, other: "PatternSet") -> None:
+        """Add the patterns of another set to this one."""
+        self.extend(other.sources, other.names)
+
+    @property
+    def fingerprint(self) -> str:
+        """Short digest of the pattern sources, for cache keys."""
+        return hashlib.sha256(b"\0".join(self.sources)).hexdigest()[:16]
+
+    def search(self, content: BytesLike) -> bool:
+        """Check whether any pattern matches."""
+        if self._compiled is not None and self._compiled.search(content) is not None:
+            return True
+        return any(compiled.search(content) is not None for _, compiled in self._separate)
+
+    def find_spans(self, content: BytesLike) -> Tuple[List[Span], int]:
+        """Locate every match in one scan; return the byte ranges and match count.
+
+        Patterns matched separately add one scan each, and their ranges are
+        merged with the rest.
+        """
+        spans: List[Span] = []
+        if self._compiled is not None:
+            for match in self._compiled.finditer(content):
+                start, end = match.span()
+                if start == end:
+                    continue
+                spans.append((start, end))
+                name = self.names[int(match.lastgroup[2:])]
+                self.hits[name] += 1
+        count = len(spans)
+
+        for index, compiled in self._separate:
+            found = [match.span() for match in compiled.finditer(content) if match.end() > match.start()]
+            if found:
+                self.hits[self.names[index]] += len(found)
+                count += len(found)
+                spans = merge_spans(spans, found)
+        return spans, count
+
+    def remove(self, content: BytesLike) -> Tuple[BytesLike, int]:
+        """Remove every match in one scan; return the new bytes and match count.
+
+        When nothing matches the original object is returned as-is.
+        """
+        spans, removed = self.find_spans(content)
+        if not spans:
+            return content, 0
+        return apply_spans(content, spans), removed
+
+    def __len__(self) -> int:
+        """Number of patterns in the set."""
+        return len(self.sources)
 
-    def remove(self, content: str) -> str:
-        """Remove matching patterns from content."""
-        if self.is_bytes:
-            return content
-        return self._compiled.sub("", content)
 
 class BoxDetector:
     """Handles detection of boxes in PDF content."""
-    
-    # Quick detection patterns
-    QUICK_PATTERNS = {
-        "basic": RegexBoxPattern(r"re\s+[SsWnfFbB]", True),
-        "styled": RegexBoxPattern(r"q.*?re\s+[SsWnfFbB].*?Q", True),
-        "text": RegexBoxPattern(r"BT.*?re\s+[SsWnfFbB]", True),
-    }
-
-    def has_boxes(self, content: bytes) -> bool:
-        """Check if content contains any box patterns."""
+
+    def __init__(self, pattern_set: Optional[PatternSet] = None):
+        """Initialize the detector with optional extra patterns."""
+        self.pattern_set = pattern_set
+
+    def has_boxes(self, content: BytesLike) -> bool:
+        """Check if content contains any box patterns.
+
+        Runs in time linear in ``len(content)`` with no backtracking blowup,
+        so it stays the cheapest step of the per-page pipeline.
+        """
         if not content:
             return False
 
         try:
-            for pattern_name, pattern in self.QUICK_PATTERNS.items():
-                if pattern.matches(content):
-                    logger.debug(f"Found {pattern_name} box pattern")
-                    return True
+            if has_painted_rect(content):
+                logger.debug("Found box pattern")
+                return True
+
+            if self.pattern_set is not None and self.pattern_set.search(content):
+                logger.debug("Found extra box pattern")
+                return True
 
             logger.debug("No box patterns detected")
             return False
@@ -149,222 +407,460 @@ class BoxDetector:
 class BoxRemover:
     """Handles the removal of rectangular boxes from PDF content."""
 
-    # Box removal patterns
-    BOX_PATTERNS = [
-        RegexBoxPattern(r"re\s+[SsWnfFbB]"),
-        RegexBoxPattern(r"[0-9.]+\s+[0-9.]+\s+[0-9.]+\s+RG\s+re\s+[SsWnfFbB]"),
-        RegexBoxPattern(r"[0-9.]+\s+[0-9.]+\s+[0-9.]+\s+rg\s+re\s+[SsWnfFbB]"),
-        RegexBoxPattern(r"q\s+[0-9.]+\s+[0-9.]+\s+[0-9.]+\s+[0-9.]+\s+re\s+[SsWnfFbB]"),
-        RegexBoxPattern(r"[0-9.]+\s+[0-9.]+\s+[0-9.]+\s+[0-9.]+\s+[0-9.]+\s+[0-9.]+\s+cm\s+re\s+[SsWnfFbB]"),
-        RegexBoxPattern(r"q\s+GS\s+[0-9.]+\s+[0-9.]+\s+[0-9.]+\s+[0-9.]+\s+re\s+[SsWnfFbB]"),
-    ]
-
-    def __init__(self):
-        """Initialize the BoxRemover."""
-        self.processed_objects: Set[str] = set()
+    # Bump whenever a change to the removal rules changes rewritten output
+    PATTERN_VERSION = "1"
+
+    def __init__(
+        self,
+        stream_cache: Optional[StreamCache] = None,
+        gc_policy: Optional[GCPolicy] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        patterns: Optional[Sequence[Union[RegexBoxPattern, str, bytes]]] = None,
+        rect_filter: Optional[RectFilter] = None,
+    ):
+        """Initialize the BoxRemover.
+
+        ``patterns`` are extra regexes whose matches are removed after the
+        built-in rectangle scan, all in a single combined pass. With a
+        ``rect_filter`` only the rectangles it selects by size, shape,
+        position or paint operator are removed.
+        """
+        self.stream_cache = stream_cache
+        self.gc_policy = gc_policy or GCPolicy()
+        self.instrumentation = instrumentation or NullInstrumentation()
+        self.processed_objects = ProcessedObjectRegistry()
+        self.stream_index = StreamIndex()
+        self.modified_streams: Dict[Tuple[int, int], int] = {}
+        self._decoded_streams: Dict[Tuple[int, int], bytes] = {}
+        self._drawn_names: Dict[Tuple[int, int], Optional[FrozenSet[str]]] = {}
+        self._cache_entries: Dict[Tuple[int, int], CacheLookup] = {}
         self.stats = ProcessingStats()
-        self.detector = BoxDetector()
+        self.pattern_set = PatternSet(patterns) if patterns else None
+        self.rect_filter = rect_filter
+        self.placements = PlacementIndex()
+        self.detector = BoxDetector(self.pattern_set)
+        self.rewriter = ContentStreamRewriter()
         self.object_helper = PDFObjectHelper()
-        self.object_id = PDFObjectIdentifier()
+
+    @property
+    def cache_version(self) -> str:
+        """Stream cache salt covering the built-in rules, extra patterns and filter."""
+        version = self.PATTERN_VERSION
+        if self.pattern_set is not None:
+            version += f"+{self.pattern_set.fingerprint}"
+        if self.rect_filter is not None:
+            version += f"+{self.rect_filter.fingerprint}"
+        return version
+
+    def _hit_counters(self) -> List[Dict[str, int]]:
+        """The per-pattern hit counters of the scanner and the extra patterns."""
+        counters = [self.rewriter.hits]
+        if self.pattern_set is not None:
+            counters.append(self.pattern_set.hits)
+        return counters
+
+    def _hit_totals(self) -> Dict[str, int]:
+        """Current hit count of every pattern name."""
+        return {name: hits for counter in self._hit_counters() for name, hits in counter.items()}
+
+    def _replay_hits(self, hits: Dict[str, int]) -> None:
+        """Add hit counts recorded in the stream cache to the counters."""
+        counters = self._hit_counters()
+        for name, count in hits.items():
+            counter = next((counter for counter in counters if name in counter), counters[-1])
+            counter[name] = counter.get(name, 0) + count
+
+    def record_pattern_hits(self) -> None:
+        """Move the per-pattern hit counts into the stats and instrumentation."""
+        for hits_by_name in self._hit_counters():
+            for name, hits in hits_by_name.items():
+                if hits:
+                    self.stats.pattern_hits[name] = self.stats.pattern_hits.get(name, 0) + hits
+                    self.instrumentation.record_pattern(name, hits)
+                hits_by_name[name] = 0
 
     def reset_state(self):
         """Reset the internal state for a new processing session."""
         self.processed_objects.clear()
+        self.stream_index = StreamIndex()
+        self.placements = PlacementIndex()
+        self.modified_streams.clear()
+        self._drawn_names.clear()
         self.stats.reset()
 
     @log_exceptions
-    def process_content_stream(self, stream: pikepdf.Stream, stream_id: Optional[str] = None) -> bool:
+    def process_content_stream(self, stream: pikepdf.Stream) -> bool:
         """Process a single content stream."""
         stream = self.object_helper.safe_get_object(stream)
         if not isinstance(stream, pikepdf.Stream):
             return False
 
-        # Get unique object identifier
-        if stream_id is None:
-            stream_id = self.object_id.get_object_id(stream, "stream_")
-        
-        logger.debug(f"Processing content stream {stream_id}")
-        if stream_id in self.processed_objects:
-            logger.debug(f"Content stream {stream_id} was previously processed")
+        stream_id = stream.objgen
+        logger.debug("Processing content stream %s", stream_id)
+        if not self.processed_objects.add(ObjectKind.STREAM, stream):
+            logger.debug("Content stream %s was previously processed", stream_id)
             return False
-            
-        self.processed_objects.add(stream_id)
-        self.stats.objects_processed += 1
 
-        # Process the content
-        content = stream.read_bytes()
-        logger.debug(f"Content stream {stream_id} size: {len(content)} bytes")
+        self.stats.objects_processed += 1
 
-        modified_content = self.remove_boxes_from_content(content)
-        if modified_content != content:
-            logger.debug(f"Content stream {stream_id} was modified")
-            stream.write(modified_content)
+        # Consult the stream cache before decoding anything
+        placements = self._placements_of(stream)
+        cache_key = None
+        if self.stream_cache is not None:
+            cache_key, cached = self._cache_lookup(stream)
+            self._cache_entries.pop(stream_id, None)
+            if cached is not None:
+                self.stats.cache_hits += 1
+                modified_content, boxes, hits, original_size = cached
+                if modified_content is None:
+                    logger.debug("Content stream %s unchanged (cached)", stream_id)
+                    return False
+                logger.debug("Content stream %s was modified (cached)", stream_id)
+                with self.instrumentation.stage("encode"):
+                    stream.write(modified_content)
+                self.instrumentation.record_stream(original_size, len(modified_content))
+                self.stats.boxes_removed += boxes
+                self._replay_hits(hits)
+                self.modified_streams[stream.objgen] = boxes
+                return True
+
+        # Process the content, reusing the copy decoded during detection
+        content = self._decoded_streams.pop(stream.objgen, None)
+        if content is None:
+            with self.instrumentation.stage("decode"):
+                content = stream.read_bytes()
+        logger.debug("Content stream %s size: %s bytes", stream_id, len(content))
+
+        result = self.remove_boxes(content, placements)
+        if result.changed:
+            logger.debug("Content stream %s was modified", stream_id)
+            with self.instrumentation.stage("encode"):
+                stream.write(result.content)
+            self.instrumentation.record_stream(len(content), len(result.content))
+            self.modified_streams[stream.objgen] = result.boxes
+            if cache_key is not None:
+                self.stream_cache.put(
+                    cache_key, result.content, result.boxes, result.hits, len(content)
+                )
             return True
             
-        logger.debug(f"No modifications needed for content stream {stream_id}")
+        logger.debug("No modifications needed for content stream %s", stream_id)
+        if cache_key is not None:
+            self.stream_cache.put(cache_key, None)
         return False
 
     @log_exceptions
     def process_page(self, page: pikepdf.Page, page_num: int) -> None:
-        """Process a single PDF page."""
-        page_id = self.object_id.get_object_id(page, f"page_{page_num}_")
-        logger.info(f"Analyzing page {page_num} (ID: {page_id})")
+        """Process a single PDF page.
 
-        if page_id in self.processed_objects:
-            logger.debug(f"Page {page_num} already processed")
+        Decoded content streams and stream cache lookups are memoized for
+        the duration of the call, so detection and rewriting share one
+        inflate per stream, and cached streams are never inflated at all.
+        """
+        try:
+            with self.instrumentation.stage("page"):
+                self._process_page(page, page_num)
+        finally:
+            self._decoded_streams.clear()
+            self._cache_entries.clear()
+
+    def _process_page(self, page: pikepdf.Page, page_num: int) -> None:
+        """Analyze a page and remove boxes from the streams it draws."""
+        logger.debug("Analyzing page %s (ID: %s)", page_num, page.objgen)
+
+        if self.processed_objects.seen(ObjectKind.PAGE, page):
+            logger.debug("Page %s already processed", page_num)
             self.stats.pages_skipped += 1
             return
 
-        if not self._should_process_page(page):
-            logger.info(f"No boxes detected on page {page_num}")
+        # Forms and soft mask groups first, then the page's own contents;
+        # streams shared with earlier pages are already done
+        streams = [
+            self.stream_index.streams[objgen]
+            for objgen in self.stream_index.drawn_streams(page, self._names_drawn)
+            if not self.processed_objects.seen(ObjectKind.STREAM, self.stream_index.streams[objgen])
+        ]
+        uses_placement = self.rect_filter is not None and self.rect_filter.uses_placement
+        if uses_placement and page not in self.placements:
+            # Without an up-front index only the pages seen so far place shared forms
+            self.placements.add_page(page)
+
+        found = False
+        for stream in streams:
+            if self._should_process_stream(stream):
+                found = True
+                break
+            # A stream without boxes never needs another look on a later page
+            self.processed_objects.add(ObjectKind.STREAM, stream)
+        if not found:
+            logger.debug("No boxes detected on page %s", page_num)
             self.stats.pages_skipped += 1
             return
 
-        self.processed_objects.add(page_id)
-        logger.info(f"Processing page {page_num}")
-
-        # Process page resources
-        if page.get("/Resources"):
-            self._process_resources(page["/Resources"])
+        self.processed_objects.add(ObjectKind.PAGE, page)
+        logger.debug("Processing page %s", page_num)
 
-        # Process page contents
-        contents = page.get("/Contents")
-        if contents:
-            if isinstance(contents, pikepdf.Array):
-                for stream in contents:
-                    self.process_content_stream(stream)
-            else:
-                self.process_content_stream(contents)
+        for stream in streams:
+            self.process_content_stream(stream)
 
         self.stats.pages_processed += 1
-        gc.collect()
-
-    def _process_resources(self, resources: pikepdf.Dictionary) -> None:
-        """Process PDF resource dictionary."""
-        resources = self.object_helper.safe_get_object(resources)
-        if not isinstance(resources, pikepdf.Dictionary):
-            return
-
-        res_id = self.object_id.get_object_id(resources, "res_")
-        if res_id in self.processed_objects:
-            return
+        self.gc_policy.maybe_collect()
 
-        self.processed_objects.add(res_id)
-        self._process_xobjects(resources)
-        self._process_extgstate(resources)
-
-    def _process_xobjects(self, resources: pikepdf.Dictionary) -> None:
-        """Process XObjects in resources."""
-        xobjects = resources.get("/XObject")
-        if not isinstance(xobjects, pikepdf.Dictionary):
-            return
-
-        try:
-            xobject_keys = list(xobjects.keys())
-            logger.debug(f"Processing XObjects: {xobject_keys}")
-
-            # Process form XObjects
-            form_keys = [k for k in xobject_keys if k.startswith("/Fm") or k.startswith("/FXX")]
-            for key in form_keys:
-                try:
-                    xobject = xobjects.get(key)
-                    if xobject is not None and xobject.get("/Subtype") == "/Form":
-                        logger.debug(f"Processing Form XObject: {key}")
-                        self._process_form_xobject(xobject)
-                except Exception as e:
-                    logger.debug(f"Skipping problematic XObject {key}: {str(e)}")
-
-            # Log skipped image XObjects
-            image_keys = [k for k in xobject_keys if k.startswith("/Im")]
-            if image_keys:
-                logger.debug(f"Skipping Image XObjects: {image_keys}")
-
-        except Exception as e:
-            logger.debug(f"Error processing XObjects: {str(e)}")
-
-    def _process_extgstate(self, resources: pikepdf.Dictionary) -> None:
-        """Process ExtGState in resources."""
-        extgstate = resources.get("/ExtGState")
-        if not isinstance(extgstate, pikepdf.Dictionary):
-            return
+    def finish_streams(self, objgens: Iterable[Tuple[int, int]], pdf: pikepdf.Pdf) -> None:
+        """Process the given streams if no page drew them.
 
+        A worker owns the shared streams its pages may draw, and the others
+        skip them, so it must rewrite them even when its own pages turn out
+        not to use them.
+        """
         try:
-            for key in extgstate.keys():
-                try:
-                    gstate = extgstate.get(key)
-                    if isinstance(gstate, pikepdf.Dictionary) and "/SMask" in gstate:
-                        logger.debug(f"Processing SMask in ExtGState: {key}")
-                        self._process_form_xobject(gstate["/SMask"])
-                except Exception as e:
-                    logger.debug(f"Skipping problematic ExtGState {key}: {str(e)}")
-        except Exception as e:
-            logger.debug(f"Error processing ExtGState: {str(e)}")
-
-    def _process_form_xobject(self, xobject: pikepdf.Stream) -> None:
-        """Process a Form XObject and its resources."""
-        xobject = self.object_helper.safe_get_object(xobject)
-        if not isinstance(xobject, pikepdf.Stream):
-            return
-
-        obj_id = self.object_id.get_object_id(xobject, "form_")
-        if obj_id in self.processed_objects:
-            logger.debug(f"XObject {obj_id} was previously processed")
-            return
-
-        self.processed_objects.add(obj_id)
-        self.stats.objects_processed += 1
-
-        if xobject.get("/Resources"):
-            logger.debug(f"Processing resources for XObject {obj_id}")
-            self._process_resources(xobject["/Resources"])
-
-        logger.debug(f"Processing content stream for XObject {obj_id}")
-        self.process_content_stream(xobject, f"stream_{obj_id}")
+            for objgen in objgens:
+                stream = pdf.get_object(objgen)
+                if self.processed_objects.seen(ObjectKind.STREAM, stream):
+                    continue
+                if self._should_process_stream(stream):
+                    self.process_content_stream(stream)
+                else:
+                    self.processed_objects.add(ObjectKind.STREAM, stream)
+        finally:
+            self._decoded_streams.clear()
+            self._cache_entries.clear()
+
+    def index_pages(
+        self, pages: Iterable[pikepdf.Page], placements: Optional[PlacementIndex] = None
+    ) -> StreamIndex:
+        """Walk the pages' resources up front, replacing any earlier index.
+
+        When the rectangle filter depends on placement, the pages are also
+        walked for where each stream is drawn, unless ``placements`` already
+        covers them (as a worker receives from its parent).
+        """
+        pages = list(pages)
+        self.stream_index = StreamIndex()
+        self.stream_index.add_pages(pages)
+        if placements is not None:
+            self.placements = placements
+        elif self.rect_filter is not None and self.rect_filter.uses_placement:
+            self.placements = PlacementIndex()
+            self.placements.add_pages(pages)
+        return self.stream_index
+
+    def skip_streams(
+        self, objgens: Iterable[Tuple[int, int]], pdf: pikepdf.Pdf
+    ) -> List[Tuple[int, int]]:
+        """Treat the given streams as done, e.g. when another worker owns them.
+
+        Returns the streams that were not already done, for ``release_streams``.
+        """
+        return [
+            objgen
+            for objgen in objgens
+            if self.processed_objects.add(ObjectKind.STREAM, pdf.get_object(objgen))
+        ]
+
+    def release_streams(self, objgens: Iterable[Tuple[int, int]], pdf: pikepdf.Pdf) -> None:
+        """Undo ``skip_streams`` so the streams can be processed again."""
+        for objgen in objgens:
+            self.processed_objects.discard(ObjectKind.STREAM, pdf.get_object(objgen))
+
+    def index_page(self, page: pikepdf.Page) -> PageRectIndex:
+        """Collect the page's removable rectangles into a spatial index.
+
+        Only the page's own content streams are indexed; the rectangles are
+        the ones ``remove_boxes`` would consider, with bounding boxes in
+        default user space, each part of ``/Contents`` continuing from the
+        graphics state the previous one left. Nothing is modified.
+        """
+        contents = page.get("/Contents")
+        if contents is None:
+            streams = []
+        elif isinstance(contents, pikepdf.Array):
+            streams = list(contents)
+        else:
+            streams = [contents]
+
+        objgens = []
+        parts = []
+        ctm, stack = IDENTITY, ()
+        for number, stream in enumerate(streams):
+            content = stream.read_bytes()
+            paths = list(self.rewriter.iter_paths(content))
+            objgens.append(stream.objgen)
+            if paths:
+                rects = collect_rects(content, paths, ctm, stack)
+                parts.append((number, rects))
+            # Later parts of /Contents continue from the state this one left
+            walk = walk_graphics_state(content, ctm, stack)
+            ctm, stack = walk.ctm, walk.stack
+
+        if parts:
+            bbox = np.concatenate([rects.bbox for _, rects in parts])
+            spans = np.concatenate([rects.spans for _, rects in parts])
+            stream_ids = np.concatenate([np.full(len(rects), n) for n, rects in parts])
+        else:
+            bbox = np.empty((0, 4))
+            spans = np.empty((0, 2), dtype=np.int64)
+            stream_ids = np.empty(0, dtype=np.int64)
+        return PageRectIndex(bbox, stream_ids, spans, objgens, GridIndex(bbox))
+
+    def _placements_of(self, stream: pikepdf.Stream) -> Optional[Tuple[Placement, ...]]:
+        """Where the stream is drawn, or None if the filter does not care."""
+        if self.rect_filter is None or not self.rect_filter.uses_placement:
+            return None
+        return self.placements.get(stream.objgen)
+
+    def _names_drawn(self, stream: pikepdf.Stream) -> Optional[FrozenSet[str]]:
+        """Resource names a stream draws with ``Do``, memoized for the document.
+
+        Read off the bytes decoded for detection, so nothing is inflated
+        twice; None for a stream the stream cache answers or another worker
+        owns, which is never decoded here.
+        """
+        key = stream.objgen
+        if key in self._drawn_names:
+            return self._drawn_names[key]
+        names = None
+        if self.processed_objects.seen(ObjectKind.STREAM, stream):
+            pass
+        elif self.stream_cache is None or self._cache_lookup(stream)[1] is None:
+            try:
+                names = drawn_names(self._read_stream(stream))
+            except Exception as e:
+                logger.debug("Could not read stream %s for its XObjects: %s", key, e)
+        if key != (0, 0):
+            self._drawn_names[key] = names
+        return names
+
+    def _read_stream(self, stream: pikepdf.Stream) -> bytes:
+        """Read decoded stream data, memoizing it until the page is done."""
+        key = stream.objgen
+        content = self._decoded_streams.get(key)
+        if content is None:
+            with self.instrumentation.stage("decode"):
+                content = stream.read_bytes()
+            if key != (0, 0):
+                self._decoded_streams[key] = content
+        return content
+
+    def _cache_lookup(self, stream: pikepdf.Stream) -> CacheLookup:
+        """Stream cache key and entry for a stream, memoized until the page is done.
+
+        The key is built from the raw bytes, so nothing is decoded.
+        """
+        objgen = stream.objgen
+        found = self._cache_entries.get(objgen)
+        if found is None:
+            version = self.cache_version
+            placements = self._placements_of(stream)
+            if placements is not None:
+                # The same bytes select different rectangles drawn elsewhere
+                version += f"+{placements}"
+            with self.instrumentation.stage("cache"):
+                cache_key = self.stream_cache.key_for(stream, version)
+                found = (cache_key, self.stream_cache.get(cache_key))
+            if objgen != (0, 0):
+                self._cache_entries[objgen] = found
+        return found
 
     def _should_process_stream(self, stream: pikepdf.Stream) -> bool:
-        """Determine if a PDF stream needs box removal."""
+        """Determine if a PDF stream needs box removal.
+
+        A stream with a stream cache entry is answered from the cache,
+        without decoding or detection; a stream found free of boxes is
+        cached as unchanged so the next run skips it the same way.
+        """
         if not isinstance(stream, pikepdf.Stream):
             return False
 
         try:
-            return self.detector.has_boxes(stream.read_bytes())
+            cache_key = None
+            if self.stream_cache is not None:
+                cache_key, cached = self._cache_lookup(stream)
+                if cached is not None:
+                    return cached[0] is not None
+            content = self._read_stream(stream)
+            with self.instrumentation.stage("detect"):
+                found = self.detector.has_boxes(content)
+            if not found and cache_key is not None:
+                self.stream_cache.put(cache_key, None)
+            return found
         except Exception as e:
-            logger.warning(f"Error reading stream: {e}")
+            logger.warning(f"Error reading stream {stream.objgen}: {e}")
             return True
 
-    def _should_process_page(self, page: pikepdf.Page) -> bool:
-        """Determine if a page needs box removal."""
-        contents = page.get("/Contents")
-        if not contents:
-            return False
-
+    def remove_boxes(
+        self, content: BytesLike, placements: Optional[Sequence[Placement]] = None
+    ) -> RemovalResult:
+        """Remove box-drawing operations and report what changed.
+
+        The rectangle scan and any extra patterns both run over the original
+        bytes; their ranges are merged and the output is built once, and
+        only if something was found. A pattern match overlapping a removed
+        rectangle is not counted as another box. ``placements`` say where the content
+        is drawn for the ``rect_filter``: a rectangle is removed only if it
+        is selected at every one of them, and none is when the sequence is
+        empty. None treats the content as a page's only content stream.
+        """
         try:
-            if isinstance(contents, pikepdf.Array):
-                return any(self._should_process_stream(stream) for stream in contents)
-            return self._should_process_stream(contents)
+            before = self._hit_totals()
+            spans, boxes = self._find_rect_spans(content, placements)
+            if self.pattern_set is not None:
+                with self.instrumentation.stage("patterns"):
+                    pattern_spans, _ = self.pattern_set.find_spans(content)
+                if pattern_spans:
+                    boxes += count_disjoint(pattern_spans, spans)
+                    spans = merge_spans(spans, pattern_spans)
+            if not spans:
+                return RemovalResult(content)
+
+            with self.instrumentation.stage("rewrite"):
+                modified_content = apply_spans(content, spans)
+            self.stats.boxes_removed += boxes
+            logger.debug("Removed %s boxes (%s bytes)", boxes, len(content) - len(modified_content))
+            hits = {
+                name: count - before.get(name, 0)
+                for name, count in self._hit_totals().items()
+                if count != before.get(name, 0)
+            }
+            return RemovalResult(modified_content, boxes, spans, hits)
         except Exception as e:
-            logger.warning(f"Error analyzing page contents: {e}")
-            return True
+            logger.error(f"Error removing boxes: {e}")
+            return RemovalResult(content)
+
+    def _find_rect_spans(
+        self, content: BytesLike, placements: Optional[Sequence[Placement]]
+    ) -> Tuple[List[Span], int]:
+        """Byte ranges of the rectangles to remove, after the geometry filter."""
+        if self.rect_filter is None:
+            with self.instrumentation.stage("rewrite"):
+                return self.rewriter.find_spans(content)
+
+        with self.instrumentation.stage("rewrite"):
+            paths = list(self.rewriter.iter_paths(content))
+        if not paths:
+            return [], 0
+        if placements is None or not self.rect_filter.uses_placement:
+            placements = (Placement(),)
+        elif not placements:
+            logger.debug("Keeping all rectangles of a stream drawn at unknown places")
+            return [], 0
+        with self.instrumentation.stage("geometry"):
+            selected = None
+            for placement in placements:
+                rects = collect_rects(content, paths, placement.ctm, placement.stack)
+                mask = select(rects, self.rect_filter, placement.page_box)
+                selected = mask if selected is None else selected & mask
+            spans, removed = removal_spans(paths, rects, selected)
+        for path, count in zip(paths, removed):
+            self.rewriter.hits[path.kind] += count
+        return spans, sum(removed)
 
     @log_exceptions
-    def remove_boxes_from_content(self, content: bytes) -> bytes:
-        """Remove box-drawing operations from PDF content stream."""
-        try:
-            content_str = content.decode("latin1")
-            original_length = len(content_str)
-
-            for pattern in self.BOX_PATTERNS:
-                try:
-                    if pattern.matches(content):
-                        content_str = pattern.remove(content_str)
-                        self.stats.boxes_removed += 1
-                except Exception as e:
-                    logger.warning(f"Error applying pattern: {e}")
-
-            if len(content_str) != original_length:
-                logger.debug(f"Removed {original_length - len(content_str)} characters")
-
-            return content_str.encode("latin1")
-        except Exception as e:
-            logger.error(f"Error removing boxes: {e}")
-            return content
+    def remove_boxes_from_content(self, content: BytesLike) -> BytesLike:
+        """Remove box-drawing operations from PDF content stream.
+
+        Works on ``bytes``, ``bytearray`` or ``memoryview`` without any text
+        decoding; unchanged content is returned as the same object. Use
+        ``remove_boxes`` to also learn whether and where it changed.
+        """
+        return self.remove_boxes(content).content
@@ -0,0 +1,289 @@
+"""Single-pass content stream scanner for box removal."""
+
+import re
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+BytesLike = Union[bytes, bytearray, memoryview]
+# A removed byte range ``(start, end)`` of a content stream
+Span = Tuple[int, int]
+
+# PDF whitespace and delimiter characters (ISO 32000-1, 7.2.2)
+_WS = rb"\x00\t\n\x0c\r "
+_SPACE = rb"[" + _WS + rb"]+"
+_END = rb"(?=[" + _WS + rb"()<>\[\]{}/%]|\Z)"
+_NUMBER = rb"[+-]?(?:\d+(?:\.\d*)?|\.\d+)"
+_RECT = (_NUMBER + _SPACE) * 4 + rb"re"
+
+WHITESPACE = frozenset(b"\x00\t\n\x0c\r ")
+BOUNDARIES = WHITESPACE | frozenset(b"()<>[]{}/%")
+
+PATH_OPERATORS = frozenset({b"m", b"l", b"c", b"v", b"y", b"h", b"re"})
+
+# ``re`` operator candidates. The literal comes first so the regex engine
+# can use its fast prefix search; the lookbehind rejects ``/re``, ``(re``
+# and runs of bare ``re`` tokens that cannot have numeric operands.
+_RE_OPERATOR = re.compile(
+    rb"re(?=[" + _WS + rb"])(?<=[0-9." + _WS + rb"][" + _WS + rb"]re)"
+)
+
+# An ``re`` operator followed by a paint or clip operator. Every byte is
+# inspected a bounded number of times: the literal prefix search is linear,
+# and the whitespace run after each ``re`` is only walked once.
+_PAINTED_RE = re.compile(
+    rb"re(?<=[0-9." + _WS + rb"][" + _WS + rb"]re)[" + _WS + rb"]+(?:[SsFnW]|[fBb])\*?" + _END
+)
+
+# Constructs whose bytes must not be mistaken for operators
+_OPAQUE = re.compile(rb"[(%]|ID(?=[" + _WS + rb"])")
+_STRING = re.compile(rb"\((?:[^()\\]|\\.)*\)", re.S)
+_STRING_TOKEN = re.compile(rb"[()\\]")
+_COMMENT = re.compile(rb"%[^\r\n]*")
+_INLINE_IMAGE_END = re.compile(rb"[" + _WS + rb"]EI(?=[" + _WS + rb"]|\Z)")
+
+_NUMBER_TOKEN = re.compile(_NUMBER)
+
+# What follows the last rectangle of a path: an optional clipping operator
+# and the paint operator that ends the path.
+_PAINT_TAIL = re.compile(
+    _SPACE + rb"(?:W\*?" + _SPACE + rb")?(?:[SsFn]|[fBb]\*?)" + _END
+)
+# One more rectangle of a run. Runs are walked one match at a time: a
+# repeated group in a single regex keeps backtracking state per repetition,
+# which costs memory proportional to the run length.
+_NEXT_RECT = re.compile(_SPACE + _RECT)
+
+
+class RectPath(NamedTuple):
+    """A removable run of rectangles found by the scanner.
+
+    ``start``/``end`` delimit the bytes that go when the whole run is
+    removed. ``kind`` is ``"rect_path"`` for a path made only of rectangles
+    (the range includes the paint operator) or ``"rect_run"`` for the
+    rectangles at the end of a mixed path. ``paint`` is the operator that
+    ends the path, e.g. ``b"S"``, ``b"f*"`` or ``b"n"``.
+    """
+    start: int
+    end: int
+    kind: str
+    paint: bytes
+
+
+def has_painted_rect(content: BytesLike) -> bool:
+    """Cheap linear-time check for a rectangle closed by a paint operator.
+
+    This may report rectangles inside strings or inline images, but it never
+    misses one that ``ContentStreamRewriter`` would remove: the last ``re``
+    of every removable path is directly followed by its paint or clip
+    operator.
+    """
+    return _PAINTED_RE.search(content) is not None
+
+
+def apply_spans(content: BytesLike, spans: Sequence[Span]) -> bytes:
+    """Return ``content`` without the given sorted, non-overlapping byte ranges.
+
+    The kept pieces are memoryview slices joined once, so the only
+    allocation is the result.
+    """
+    view = memoryview(content)
+    kept = []
+    copied = 0
+    for start, end in spans:
+        kept.append(view[copied:start])
+        copied = end
+    kept.append(view[copied:])
+    return b"".join(kept)
+
+
+def merge_spans(*span_lists: Sequence[Span]) -> List[Span]:
+    """Merge several sorted span lists into one, joining overlapping ranges."""
+    merged: List[Span] = []
+    for start, end in sorted(span for spans in span_lists for span in spans):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def count_disjoint(spans: Sequence[Span], others: Sequence[Span]) -> int:
+    """Count the spans that overlap none of ``others``; both sorted and non-overlapping."""
+    count = 0
+    other = 0
+    for start, end in spans:
+        while other < len(others) and others[other][1] <= start:
+            other += 1
+        if other == len(others) or others[other][0] >= end:
+            count += 1
+    return count
+
+
+def _skip_string(data: bytes, pos: int) -> int:
+    """Return the offset just past the literal string opening at ``pos``."""
+    match = _STRING.match(data, pos)
+    if match is not None:
+        return match.end()
+
+    depth = 0
+    while True:
+        m = _STRING_TOKEN.search(data, pos)
+        if m is None:
+            return len(data)
+        char = data[m.start()]
+        if char == 0x5C:  # backslash escapes the next byte
+            pos = m.end() + 1
+            continue
+        depth += 1 if char == 0x28 else -1
+        pos = m.end()
+        if depth == 0:
+            return pos
+
+
+def _skip_opaque(data: bytes, start: int) -> int:
+    """Return the offset just past the string, comment or inline image at ``start``."""
+    char = data[start]
+    if char == 0x28:  # (
+        return _skip_string(data, start)
+    if char == 0x25:  # %
+        return _COMMENT.match(data, start).end()
+    if start > 0 and data[start - 1] not in WHITESPACE:
+        return start + 2  # ID inside a longer token
+    end = _INLINE_IMAGE_END.search(data, start + 3)
+    return end.end() if end else len(data)
+
+
+def _operands_start(data: bytes, end: int, floor: int) -> Optional[int]:
+    """Return where the four numeric operands ending at ``end`` begin."""
+    i = end
+    for _ in range(4):
+        while i > floor and data[i - 1] in WHITESPACE:
+            i -= 1
+        j = i
+        while j > floor and data[j - 1] not in BOUNDARIES:
+            j -= 1
+        if j == i or _NUMBER_TOKEN.fullmatch(data, j, i) is None:
+            return None
+        i = j
+    if i > 0 and data[i - 1] not in WHITESPACE:
+        return None
+    return i
+
+
+def _rect_run_end(data: BytesLike, pos: int) -> int:
+    """Return the end of the run of rectangles that continues at ``pos``."""
+    while True:
+        match = _NEXT_RECT.match(data, pos)
+        if match is None:
+            return pos
+        pos = match.end()
+
+
+def _previous_token(data: BytesLike, pos: int) -> Optional[bytes]:
+    """Return the token before ``pos``; ``b""`` at the start, None after a delimiter."""
+    j = pos
+    while j > 0 and data[j - 1] in WHITESPACE:
+        j -= 1
+    if j == 0:
+        return b""
+    if data[j - 1] in BOUNDARIES:
+        return None
+    k = j
+    while k > 0 and data[k - 1] not in BOUNDARIES:
+        k -= 1
+    return bytes(data[k:j])
+
+
+class ContentStreamRewriter:
+    """Removes painted rectangle paths from a content stream in one pass.
+
+    The scanner jumps between ``re`` operators, checks that each one is a
+    real operator (not inside a string, comment or inline image) with four
+    numeric operands, and follows it to the paint operator that ends the
+    path. A path made only of rectangles is dropped together with its
+    operands and paint operator. If other segments precede the rectangles,
+    only the rectangles are dropped so the paint operator still applies to
+    the rest. ``find_spans`` reports what would be removed without building
+    any output; ``rewrite`` also applies it. Removed rectangles are counted
+    per kind in ``hits``.
+    """
+
+    def __init__(self):
+        """Initialize the per-kind removal counters."""
+        self.hits: Dict[str, int] = {"rect_path": 0, "rect_run": 0}
+
+    def iter_paths(self, content: BytesLike) -> Iterator[RectPath]:
+        """Yield every removable path in ``content`` in stream order.
+
+        ``content`` may be ``bytes``, ``bytearray`` or a ``memoryview``; it is
+        scanned in place and never copied.
+        """
+        data = content
+        pos = 0
+        candidate = None
+
+        while True:
+            if candidate is None or candidate.start() < pos:
+                candidate = _RE_OPERATOR.search(data, pos)
+                if candidate is None:
+                    return
+            op_start, op_end = candidate.span()
+
+            opaque = _OPAQUE.search(data, pos, op_start)
+            if opaque is not None:
+                pos = _skip_opaque(data, opaque.start())
+                continue
+
+            floor, pos = pos, op_end
+            start = _operands_start(data, op_start, floor)
+            if start is None:
+                continue
+            previous = _previous_token(data, start)
+            if previous is None or _NUMBER_TOKEN.fullmatch(previous):
+                continue
+            run_end = _rect_run_end(data, op_end)
+            tail = _PAINT_TAIL.match(data, run_end)
+            if tail is None:
+                # The rest of the run shares this tail, so none of its
+                # rectangles can end a removable path either
+                pos = run_end
+                continue
+
+            paint = _previous_token(data, tail.end())
+            if previous in PATH_OPERATORS:
+                # Mixed path: keep the paint operator for the other segments
+                end = run_end
+                yield RectPath(start, end, "rect_run", paint)
+            else:
+                end = tail.end()
+                yield RectPath(start, end, "rect_path", paint)
+            pos = end
+
+    def find_spans(self, content: BytesLike) -> Tuple[List[Span], int]:
+        """Locate removable paths; return their byte ranges and rectangle count.
+
+        The ranges are sorted and do not overlap.
+        """
+        data = content
+        view = memoryview(content)
+        spans: List[Span] = []
+        removed = 0
+        for path in self.iter_paths(content):
+            spans.append((path.start, path.end))
+            if isinstance(data, memoryview):
+                count = bytes(view[path.start:path.end]).count(b"re")
+            else:
+                count = data.count(b"re", path.start, path.end)
+            removed += count
+            self.hits[path.kind] += count
+        return spans, removed
+
+    def rewrite(self, content: BytesLike) -> Tuple[BytesLike, int]:
+        """Rewrite ``content`` and return the new bytes and rectangle count.
+
+        When nothing is removed the original object is returned as-is.
+        """
+        spans, removed = self.find_spans(content)
+        if not spans:
+            return content, 0
+        return apply_spans(content, spans), removed
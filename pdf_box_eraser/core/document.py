@@ -0,0 +1,80 @@
+"""An input PDF opened once and shared by every step of a job."""
+
+import logging
+from typing import Dict, Optional
+
+import pikepdf
+
+logger = logging.getLogger(__name__)
+
+# Inputs are memory-mapped so large files are read through the page cache
+# rather than copied onto the heap; pikepdf falls back to plain reads where
+# a file cannot be mapped.
+INPUT_ACCESS_MODE = pikepdf.AccessMode.mmap
+
+
+def open_input(pdf_path: str) -> pikepdf.Pdf:
+    """Open an input PDF for reading with memory-mapped access."""
+    return pikepdf.open(pdf_path, access_mode=INPUT_ACCESS_MODE)
+
+
+class PDFDocument:
+    """A PDF file parsed at most once and reused for page count, metadata and processing.
+
+    The pikepdf handle is opened on first use and kept until ``close``.
+    Processing through ``PDFProcessor`` rewrites this handle in place, so
+    the owner decides when it goes away. The file at ``path`` is never
+    modified; renderers such as poppler read it from disk directly, and
+    only outputs that were written to disk are ever handed to them.
+    """
+
+    def __init__(self, path: str):
+        """Remember the path; nothing is opened yet."""
+        self.path = str(path)
+        self._pdf: Optional[pikepdf.Pdf] = None
+        self._page_count: Optional[int] = None
+        self._metadata: Optional[Dict[str, str]] = None
+
+    @property
+    def pdf(self) -> pikepdf.Pdf:
+        """The open document, parsed on first access."""
+        if self._pdf is None:
+            logger.debug("Opening %s", self.path)
+            self._pdf = open_input(self.path)
+        return self._pdf
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the file has been parsed and not yet closed."""
+        return self._pdf is not None
+
+    @property
+    def page_count(self) -> int:
+        """Number of pages, remembered after the first call."""
+        if self._page_count is None:
+            self._page_count = len(self.pdf.pages)
+        return self._page_count
+
+    @property
+    def metadata(self) -> Dict[str, str]:
+        """Document information entries (``/Title``, ``/Author``, ...) as strings."""
+        if self._metadata is None:
+            try:
+                docinfo = self.pdf.docinfo
+                self._metadata = {str(key): str(value) for key, value in docinfo.items()}
+            except Exception as e:
+                logger.warning(f"Could not read metadata of {self.path}: {e}")
+                self._metadata = {}
+        return self._metadata
+
+    def close(self) -> None:
+        """Release the handle; page count and metadata stay available if already read."""
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+    def __enter__(self) -> "PDFDocument":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
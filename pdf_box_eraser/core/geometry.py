@@ -0,0 +1,355 @@
+"""Vectorized geometry filters for the rectangles found in a content stream."""
+
+import re
+import logging
+from dataclasses import dataclass, asdict
+from typing import FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pdf_box_eraser.core.spatial import REGION_MODES, GridIndex
+from pdf_box_eraser.core.content_stream import (
+    BytesLike,
+    RectPath,
+    Span,
+    _NUMBER,
+    _SPACE,
+    _WS,
+    _END,
+    _INLINE_IMAGE_END,
+    _skip_opaque,
+)
+
+logger = logging.getLogger(__name__)
+
+# PDF matrices ``[a b c d e f]``
+Matrix = Tuple[float, float, float, float, float, float]
+IDENTITY: Matrix = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+STROKE_OPERATORS = frozenset({b"S", b"s"})
+MARGIN_MODES = ("exclude", "only")
+
+# One rectangle with its four operands captured
+_RECT_OPERANDS = re.compile(
+    rb"(" + _NUMBER + rb")" + _SPACE + rb"(" + _NUMBER + rb")" + _SPACE
+    + rb"(" + _NUMBER + rb")" + _SPACE + rb"(" + _NUMBER + rb")" + _SPACE + rb"re"
+)
+
+# Graphics state operators (``q``, ``Q``, ``cm``), XObject invocations
+# (``Do``) and the starts of the constructs that may contain look-alikes:
+# strings, comments, inline images
+_BOUNDARY = rb"(?<![^" + _WS + rb"()<>\[\]{}%])"
+_STATE_TOKEN = re.compile(rb"[(%]|" + _BOUNDARY + rb"(q|Q|cm|Do|BI)" + _END)
+# Six operands, or one name, never take more than this many bytes in practice
+_CM_LOOKBACK = 128
+_NAME_ESCAPE = re.compile(rb"#([0-9A-Fa-f]{2})")
+# A name operand followed by ``Do``
+_DO_CALL = re.compile(rb"/([^" + _WS + rb"()<>\[\]{}/%]+)[" + _WS + rb"]*Do" + _END)
+
+
+@dataclass(frozen=True)
+class RectFilter:
+    """Which rectangles to remove, judged by their position on the page.
+
+    Sizes are in default user space units (1/72 inch) after applying the
+    current transformation matrix, measured on each rectangle's bounding
+    box. ``aspect`` is the long side divided by the short side. With
+    ``margin`` set, rectangles closer than that to any page edge are kept
+    (``margin_mode="exclude"``) or are the only ones removed
+    (``margin_mode="only"``). ``stroke_only`` limits removal to outlines
+    painted with ``S``/``s``. With ``regions`` (``x0 y0 x1 y1`` boxes in
+    the same space) only rectangles that intersect one of them, or lie
+    inside one with ``region_mode="contain"``, are removed. Unset limits do
+    not filter anything.
+
+    Form XObjects are placed on the page through the CTM at each ``Do``
+    that draws them (see ``Placement``). A form drawn at several places
+    only loses the rectangles selected at every one of them, and streams
+    whose placement is unknown, such as soft mask groups, keep all their
+    rectangles unless only ``stroke_only`` is set.
+    """
+    min_area: Optional[float] = None
+    max_area: Optional[float] = None
+    min_aspect: Optional[float] = None
+    max_aspect: Optional[float] = None
+    margin: Optional[float] = None
+    margin_mode: str = "exclude"
+    stroke_only: bool = False
+    regions: Optional[Tuple[Tuple[float, float, float, float], ...]] = None
+    region_mode: str = "intersect"
+
+    def __post_init__(self):
+        """Validate the modes and freeze the regions."""
+        if self.margin_mode not in MARGIN_MODES:
+            raise ValueError(f"Unknown margin mode: {self.margin_mode}")
+        if self.region_mode not in REGION_MODES:
+            raise ValueError(f"Unknown region mode: {self.region_mode}")
+        if self.regions is not None:
+            regions = tuple(tuple(float(v) for v in region) for region in self.regions)
+            if any(len(region) != 4 for region in regions):
+                raise ValueError("Regions must be given as x0, y0, x1, y1")
+            object.__setattr__(self, "regions", regions)
+
+    @property
+    def uses_placement(self) -> bool:
+        """Whether the result depends on where a stream is drawn on the page."""
+        return any(
+            value is not None
+            for value in (
+                self.min_area, self.max_area, self.min_aspect, self.max_aspect,
+                self.margin, self.regions,
+            )
+        )
+
+    @property
+    def fingerprint(self) -> str:
+        """Stable identifier of the settings, for cache keys."""
+        return ",".join(f"{name}={value}" for name, value in asdict(self).items())
+
+
+@dataclass(frozen=True)
+class Placement:
+    """Where a content stream is drawn.
+
+    ``ctm`` is in effect when the stream starts: identity, or whatever an
+    earlier part of the page's ``/Contents`` left behind, for page content;
+    the form's ``/Matrix`` times the CTM at the ``Do`` for a form.
+    ``stack`` holds the states saved by earlier parts of ``/Contents`` that
+    this part may restore. ``page_box`` is the media box of the page.
+    """
+    ctm: Matrix = IDENTITY
+    stack: Tuple[Matrix, ...] = ()
+    page_box: Optional[Tuple[float, float, float, float]] = None
+
+
+@dataclass
+class StateWalk:
+    """Graphics state seen while scanning a content stream.
+
+    ``positions`` and ``matrices`` give the CTM from each offset on,
+    ``invocations`` every ``/Name Do`` with the CTM in effect there, and
+    ``ctm`` and ``stack`` the state at the end of the stream.
+    """
+    positions: List[int]
+    matrices: List[Matrix]
+    invocations: List[Tuple[str, Matrix]]
+    ctm: Matrix
+    stack: Tuple[Matrix, ...]
+
+
+@dataclass
+class RectArrays:
+    """Rectangles of one content stream, one row per rectangle.
+
+    ``spans`` are the byte ranges of each ``x y w h re``; ``path`` indexes
+    into the list of ``RectPath`` objects the rectangles came from; ``bbox``
+    holds ``x0 y0 x1 y1`` in default user space.
+    """
+    spans: np.ndarray
+    path: np.ndarray
+    bbox: np.ndarray
+    stroked: np.ndarray
+
+    def __len__(self) -> int:
+        """Number of rectangles."""
+        return len(self.path)
+
+
+def _multiply(m: Matrix, n: Matrix) -> Matrix:
+    """Return the product ``m x n`` of two PDF matrices."""
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (
+        a * a2 + b * c2,
+        a * b2 + b * d2,
+        c * a2 + d * c2,
+        c * b2 + d * d2,
+        e * a2 + f * c2 + e2,
+        e * b2 + f * d2 + f2,
+    )
+
+
+def _decode_name(name: bytes) -> str:
+    """Resource name as pikepdf spells it, with ``#xx`` escapes resolved."""
+    text = _NAME_ESCAPE.sub(lambda m: bytes([int(m.group(1), 16)]), name)
+    return "/" + text.decode("latin-1")
+
+
+def drawn_names(content: BytesLike) -> FrozenSet[str]:
+    """Resource names drawn with ``Do``, found by a single regex scan.
+
+    Much cheaper than ``walk_graphics_state`` when only the names matter.
+    Strings and inline images are not skipped, so a look-alike inside one
+    is reported too; that only makes the caller look at one more XObject.
+    """
+    return frozenset(_decode_name(match.group(1)) for match in _DO_CALL.finditer(content))
+
+
+def walk_graphics_state(
+    content: BytesLike, ctm: Matrix = IDENTITY, stack: Sequence[Matrix] = ()
+) -> StateWalk:
+    """Follow ``q``, ``Q``, ``cm`` and ``Do`` through a content stream.
+
+    Starts from ``ctm`` with ``stack`` already saved, so the parts of a
+    page's ``/Contents`` can be walked one after the other. Strings,
+    comments and inline images are skipped the same way the rectangle
+    scanner skips them.
+    """
+    positions = [0]
+    matrices = [ctm]
+    invocations: List[Tuple[str, Matrix]] = []
+    stack = list(stack)
+    pos = 0
+    while True:
+        match = _STATE_TOKEN.search(content, pos)
+        if match is None:
+            break
+        operator = match.group(1)
+        pos = match.end()
+        if operator is None:
+            pos = _skip_opaque(content, match.start())
+            continue
+        if operator == b"BI":
+            end = _INLINE_IMAGE_END.search(content, pos)
+            pos = end.end() if end else len(content)
+            continue
+        if operator == b"q":
+            stack.append(ctm)
+            continue
+        start = match.start()
+        if operator == b"Do":
+            operands = bytes(content[max(0, start - _CM_LOOKBACK):start]).split()
+            if operands and operands[-1].startswith(b"/"):
+                invocations.append((_decode_name(operands[-1][1:]), ctm))
+            continue
+        if operator == b"Q":
+            if not stack:
+                continue
+            ctm = stack.pop()
+        else:
+            operands = bytes(content[max(0, start - _CM_LOOKBACK):start]).split()[-6:]
+            try:
+                matrix = tuple(map(float, operands))
+            except ValueError:
+                continue
+            if len(matrix) != 6:
+                continue
+            ctm = _multiply(matrix, ctm)
+        positions.append(pos)
+        matrices.append(ctm)
+    return StateWalk(positions, matrices, invocations, ctm, tuple(stack))
+
+
+def ctm_changes(
+    content: BytesLike, base: Matrix = IDENTITY, stack: Sequence[Matrix] = ()
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the offsets where the CTM changes and the matrix from each one on.
+
+    The first entry is ``(0, base)``; see ``walk_graphics_state``.
+    """
+    walk = walk_graphics_state(content, base, stack)
+    return np.asarray(walk.positions, dtype=np.int64), np.asarray(walk.matrices, dtype=np.float64)
+
+
+def collect_rects(
+    content: BytesLike,
+    paths: Sequence[RectPath],
+    base: Matrix = IDENTITY,
+    stack: Sequence[Matrix] = (),
+) -> RectArrays:
+    """Gather the rectangles of ``paths`` with their user space bounding boxes.
+
+    ``base`` and ``stack`` are the stream's starting state, as in ``Placement``.
+    """
+    spans = []
+    path_index = []
+    operands = []
+    for i, path in enumerate(paths):
+        for match in _RECT_OPERANDS.finditer(content, path.start, path.end):
+            spans.append(match.span())
+            path_index.append(i)
+            operands.append(match.group(1, 2, 3, 4))
+
+    count = len(spans)
+    spans_array = np.asarray(spans, dtype=np.int64).reshape(count, 2)
+    xywh = np.asarray(operands, dtype=np.float64).reshape(count, 4)
+    path_array = np.asarray(path_index, dtype=np.int64)
+    stroked = np.asarray([paths[i].paint in STROKE_OPERATORS for i in path_index], dtype=bool)
+
+    positions, matrices = ctm_changes(content, base, stack)
+    ctm = matrices[np.searchsorted(positions, spans_array[:, 0], side="right") - 1]
+
+    x, y, w, h = xywh.T
+    xs = np.stack([x, x + w, x, x + w], axis=1)
+    ys = np.stack([y, y, y + h, y + h], axis=1)
+    a, b, c, d, e, f = (ctm[:, i:i + 1] for i in range(6))
+    ux = a * xs + c * ys + e
+    uy = b * xs + d * ys + f
+    bbox = np.stack([ux.min(axis=1), uy.min(axis=1), ux.max(axis=1), uy.max(axis=1)], axis=1)
+    return RectArrays(spans_array, path_array, bbox, stroked)
+
+
+def select(
+    rects: RectArrays, rect_filter: RectFilter, page_box: Optional[Sequence[float]] = None
+) -> np.ndarray:
+    """Boolean mask of the rectangles ``rect_filter`` removes."""
+    selected = np.ones(len(rects), dtype=bool)
+    x0, y0, x1, y1 = rects.bbox.T
+    width = x1 - x0
+    height = y1 - y0
+
+    if rect_filter.min_area is not None or rect_filter.max_area is not None:
+        area = width * height
+        if rect_filter.min_area is not None:
+            selected &= area >= rect_filter.min_area
+        if rect_filter.max_area is not None:
+            selected &= area <= rect_filter.max_area
+
+    if rect_filter.min_aspect is not None or rect_filter.max_aspect is not None:
+        short = np.minimum(width, height)
+        long = np.maximum(width, height)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            aspect = np.where(long > 0, long / short, 1.0)
+        if rect_filter.min_aspect is not None:
+            selected &= aspect >= rect_filter.min_aspect
+        if rect_filter.max_aspect is not None:
+            selected &= aspect <= rect_filter.max_aspect
+
+    if rect_filter.margin is not None and page_box is not None:
+        llx, lly, urx, ury = page_box
+        margin = rect_filter.margin
+        near = (x0 - llx < margin) | (urx - x1 < margin) | (y0 - lly < margin) | (ury - y1 < margin)
+        selected &= near if rect_filter.margin_mode == "only" else ~near
+
+    if rect_filter.stroke_only:
+        selected &= rects.stroked
+
+    if rect_filter.regions is not None:
+        index = GridIndex(rects.bbox)
+        selected &= index.mask(rect_filter.regions, rect_filter.region_mode)
+
+    return selected
+
+
+def removal_spans(
+    paths: Sequence[RectPath], rects: RectArrays, selected: np.ndarray
+) -> Tuple[List[Span], List[int]]:
+    """Turn a selection into byte ranges to remove.
+
+    A path whose rectangles are all selected goes entirely, paint operator
+    included, exactly as without a filter. Otherwise only the selected
+    ``x y w h re`` operators are cut and the path keeps painting the rest.
+    Also returns how many rectangles were removed from each path.
+    """
+    totals = np.bincount(rects.path, minlength=len(paths))
+    chosen = np.bincount(rects.path[selected], minlength=len(paths))
+
+    spans: List[Span] = []
+    for i in np.flatnonzero(chosen == totals):
+        if totals[i]:
+            spans.append((paths[i].start, paths[i].end))
+    partial = (chosen > 0) & (chosen < totals)
+    cut = selected & partial[rects.path]
+    spans.extend((int(start), int(end)) for start, end in rects.spans[cut])
+    spans.sort()
+    return spans, chosen.tolist()
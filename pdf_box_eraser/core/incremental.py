@@ -0,0 +1,150 @@
+"""Incremental-update writer that appends rewritten streams to the original file."""
+
+import re
+import zlib
+import shutil
+import logging
+import pikepdf
+from typing import BinaryIO, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Keys that describe the encoded data and are rewritten for the new body
+_ENCODING_KEYS = {"/Length", "/Filter", "/DecodeParms"}
+_TRAILER_KEYS = ("/Root", "/Info", "/ID")
+_STARTXREF = re.compile(rb"startxref\s+(\d+)")
+
+
+def find_startxref(tail: bytes) -> int:
+    """Offset of the last cross-reference section, given the end of a PDF file."""
+    matches = list(_STARTXREF.finditer(tail))
+    if not matches:
+        raise ValueError("No startxref found at the end of the file")
+    return int(matches[-1].group(1))
+
+
+def uses_xref_stream(section_start: bytes) -> bool:
+    """Whether a cross-reference section is a stream rather than a table."""
+    return not section_start.lstrip().startswith(b"xref")
+
+
+def _subsections(objnums: List[int]) -> List[Tuple[int, int]]:
+    """Group sorted object numbers into ``(first, count)`` runs."""
+    runs: List[List[int]] = []
+    for objnum in objnums:
+        if runs and runs[-1][0] + runs[-1][1] == objnum:
+            runs[-1][1] += 1
+        else:
+            runs.append([objnum, 1])
+    return [(first, count) for first, count in runs]
+
+
+def _serialize_stream(objnum: int, gen: int, stream: pikepdf.Stream) -> bytes:
+    """Serialize a stream as a Flate-compressed indirect object."""
+    data = zlib.compress(stream.read_bytes())
+    stream_dict = pikepdf.Dictionary(
+        {key: value for key, value in stream.stream_dict.items() if key not in _ENCODING_KEYS}
+    )
+    stream_dict.Filter = pikepdf.Name.FlateDecode
+    stream_dict.Length = len(data)
+    return (
+        f"{objnum} {gen} obj\n".encode()
+        + stream_dict.unparse()
+        + b"\nstream\n"
+        + data
+        + b"\nendstream\nendobj\n"
+    )
+
+
+def _trailer_entries(pdf: pikepdf.Pdf) -> bytes:
+    """Unparsed trailer entries carried over to the new section."""
+    return b"".join(
+        key.encode() + b" " + pdf.trailer[key].unparse() + b" "
+        for key in _TRAILER_KEYS
+        if key in pdf.trailer
+    )
+
+
+def write_incremental_update(
+    original_path: str,
+    pdf: pikepdf.Pdf,
+    modified: Iterable[Tuple[int, int]],
+    output: BinaryIO,
+) -> int:
+    """Copy ``original_path`` to ``output`` and append the modified streams.
+
+    ``pdf`` must have been opened from ``original_path``; ``modified`` lists
+    the objgens of the streams rewritten in it. A new cross-reference
+    section chained to the original through ``/Prev`` is appended in the
+    same form (table or stream) as the original's. Returns the number of
+    bytes appended.
+    """
+    if pdf.is_encrypted:
+        raise ValueError("Incremental updates of encrypted files are not supported")
+
+    with open(original_path, "rb") as f:
+        base = f.seek(0, 2)
+        f.seek(max(0, base - 4096))
+        prev = find_startxref(f.read())
+        f.seek(prev)
+        xref_stream = uses_xref_stream(f.read(16))
+        f.seek(0)
+        shutil.copyfileobj(f, output, 1024 * 1024)
+
+    body = bytearray(b"\n")
+    offsets = {}
+    for objnum, gen in sorted(modified):
+        offsets[objnum] = (base + len(body), gen)
+        body += _serialize_stream(objnum, gen, pdf.get_object(objnum, gen))
+
+    size = max([int(pdf.trailer.get("/Size", 0))] + [objnum + 1 for objnum in offsets])
+    startxref = base + len(body)
+    if xref_stream:
+        body += _xref_stream_section(pdf, offsets, size, prev, startxref)
+    else:
+        body += _xref_table_section(pdf, offsets, size, prev)
+    body += b"startxref\n%d\n%%%%EOF\n" % startxref
+
+    output.write(body)
+    logger.info(f"Appended {len(offsets)} streams ({len(body)} bytes) to {original_path}")
+    return len(body)
+
+
+def _xref_table_section(pdf: pikepdf.Pdf, offsets, size: int, prev: int) -> bytes:
+    """Build a classic ``xref`` table and trailer for the appended objects."""
+    section = bytearray(b"xref\n")
+    for first, count in _subsections(sorted(offsets)):
+        section += b"%d %d\n" % (first, count)
+        for objnum in range(first, first + count):
+            offset, gen = offsets[objnum]
+            section += b"%010d %05d n \n" % (offset, gen)
+    section += b"trailer\n<< /Size %d /Prev %d " % (size, prev)
+    section += _trailer_entries(pdf) + b">>\n"
+    return bytes(section)
+
+
+def _xref_stream_section(pdf: pikepdf.Pdf, offsets, size: int, prev: int, startxref: int) -> bytes:
+    """Build a cross-reference stream covering the appended objects and itself."""
+    xref_objnum = size
+    entries = dict(offsets)
+    entries[xref_objnum] = (startxref, 0)
+
+    # Field widths: entry type, offset wide enough for this file, generation
+    offset_width = max(4, (startxref.bit_length() + 7) // 8)
+    objnums = sorted(entries)
+    rows = bytearray()
+    for objnum in objnums:
+        offset, gen = entries[objnum]
+        rows += b"\x01" + offset.to_bytes(offset_width, "big") + gen.to_bytes(2, "big")
+    data = zlib.compress(bytes(rows))
+
+    index = b" ".join(b"%d %d" % run for run in _subsections(objnums))
+    widths = b"1 %d 2" % offset_width
+    return (
+        b"%d 0 obj\n<< /Type /XRef /Size %d /Prev %d /Index [%s] /W [%s] "
+        % (xref_objnum, size + 1, prev, index, widths)
+        + _trailer_entries(pdf)
+        + b"/Filter /FlateDecode /Length %d >>\nstream\n" % len(data)
+        + data
+        + b"\nendstream\nendobj\n"
+    )
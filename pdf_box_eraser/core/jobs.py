@@ -0,0 +1,294 @@
+"""Local job queue for running PDF processing off the UI thread."""
+
+import os
+import json
+import time
+import errno
+import shutil
+import socket
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterator, Optional, Union
+from pdf_box_eraser.core.pdf_processor import PDFProcessor
+from pdf_box_eraser.core.document import PDFDocument
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_DIR = Path(tempfile.gettempdir()) / "pdf_box_eraser_jobs"
+
+JOB_FILE = "job.json"
+INPUT_FILE = "input.pdf"
+OUTPUT_FILE = "output.pdf"
+
+# Finished jobs older than this are deleted
+DEFAULT_RETENTION = 24 * 3600
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """Persisted state of one processing job."""
+    job_id: str
+    input_path: str
+    output_path: str
+    start_page: int
+    end_page: int
+    status: str = QUEUED
+    progress: float = 0.0
+    stats: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    updated: float = field(default_factory=time.time)
+    owner: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job has reached a final state."""
+        return self.status in (DONE, FAILED)
+
+
+def _process_token(pid: int) -> str:
+    """Tell apart processes that reuse a pid, as after a container restart.
+
+    Combines the boot id with the process start time, both from ``/proc``;
+    empty where ``/proc`` is unavailable.
+    """
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            boot_id = f.read().strip()
+        with open(f"/proc/{pid}/stat") as f:
+            # The command name may contain spaces, so split after it
+            fields = f.read().rpartition(")")[2].split()
+        return f"{boot_id}-{fields[19]}"
+    except (OSError, IndexError):
+        return ""
+
+
+def _owner_id() -> str:
+    """Identify the current process as ``host:pid:token``."""
+    pid = os.getpid()
+    return f"{socket.gethostname()}:{pid}:{_process_token(pid)}"
+
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    """Whether the process that queued a job may still be running it.
+
+    Owners on another host cannot be checked and are assumed alive. A live
+    pid whose process token differs belongs to a different process.
+    """
+    if not owner:
+        return False
+    host, _, rest = owner.partition(":")
+    pid, _, token = rest.partition(":")
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ValueError:
+        return False
+    except OSError as e:
+        if e.errno != errno.EPERM:
+            return False
+    return token == _process_token(int(pid))
+
+
+def _write_job(job: Job) -> None:
+    """Atomically persist ``job`` next to its input file."""
+    job.updated = time.time()
+    job_dir = Path(job.input_path).parent
+    fd, tmp_name = tempfile.mkstemp(dir=job_dir, prefix=".job")
+    with os.fdopen(fd, "w") as f:
+        json.dump(asdict(job), f)
+    os.replace(tmp_name, job_dir / JOB_FILE)
+
+
+def _read_job(job_dir: Path) -> Optional[Job]:
+    """Load a persisted job, or None if it does not exist or is unreadable."""
+    try:
+        with open(job_dir / JOB_FILE) as f:
+            return Job(**json.load(f))
+    except FileNotFoundError:
+        return None
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Skipping job {job_dir.name} with a corrupt {JOB_FILE}: {e}")
+        return None
+
+
+def _run_job(job_dir: str, progress_interval: float = 0.5) -> None:
+    """Run a queued job in a worker process, persisting progress as it goes."""
+    job = _read_job(Path(job_dir))
+    job.status = RUNNING
+    _write_job(job)
+
+    last_write = 0.0
+
+    def update_progress(progress: float, stats) -> None:
+        nonlocal last_write
+        job.progress = progress
+        job.stats = asdict(stats)
+        now = time.monotonic()
+        if now - last_write >= progress_interval:
+            last_write = now
+            _write_job(job)
+
+    processor = PDFProcessor()
+    try:
+        with PDFDocument(job.input_path) as document:
+            processor.process_pdf_to_stream(
+                document,
+                job.output_path,
+                job.start_page,
+                job.end_page,
+                update_progress,
+            )
+    except Exception as e:
+        job.status = FAILED
+        job.error = str(e)
+    else:
+        job.status = DONE
+        job.progress = 1.0
+    job.stats = asdict(processor.box_remover.stats)
+    _write_job(job)
+
+
+class JobQueue:
+    """Runs processing jobs on a bounded process pool.
+
+    Jobs are identified by a hash of the input file and the page range, so
+    a rerun or a second user submitting the same work gets the existing job
+    instead of starting a duplicate. Job state and outputs are persisted
+    under ``root`` and survive the submitting session. Each job records the
+    server process that queued it, so several servers can share ``root``;
+    finished jobs are deleted once they are ``retention`` seconds old.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path] = DEFAULT_JOB_DIR,
+        max_workers: int = 2,
+        retention: float = DEFAULT_RETENTION,
+    ):
+        """Initialize the queue with a job directory, worker count and retention."""
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.retention = retention
+        self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._recover_interrupted()
+        self.prune()
+
+    def _jobs(self) -> Iterator[Job]:
+        """Every persisted job under ``root``."""
+        for job_dir in self.root.iterdir():
+            job = _read_job(job_dir) if job_dir.is_dir() else None
+            if job is not None:
+                yield job
+
+    def _recover_interrupted(self) -> None:
+        """Mark jobs whose queuing process has died as failed.
+
+        Jobs of another live server sharing ``root`` are left running. Jobs
+        that name this process were left by an earlier one with the same
+        pid, since this queue has not submitted anything yet.
+        """
+        owner = _owner_id()
+        for job in self._jobs():
+            if not job.finished and (job.owner == owner or not _owner_alive(job.owner)):
+                job.status = FAILED
+                job.error = "Interrupted before completion"
+                _write_job(job)
+
+    def prune(self) -> int:
+        """Delete finished jobs older than the retention period; return how many."""
+        cutoff = time.time() - self.retention
+        removed = 0
+        with self._lock:
+            for job in self._jobs():
+                if job.finished and job.updated < cutoff:
+                    self.remove(job.job_id)
+                    removed += 1
+        if removed:
+            logger.info(f"Removed {removed} expired jobs")
+        return removed
+
+    @staticmethod
+    def job_id_for(input_path: Union[str, Path], start_page: int, end_page: int) -> str:
+        """Derive a stable job ID from the file content and page range."""
+        digest = hashlib.sha256()
+        with open(input_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return f"{digest.hexdigest()[:16]}-{start_page}-{end_page}"
+
+    def submit(self, input_path: Union[str, Path], start_page: int, end_page: int) -> str:
+        """Queue ``input_path`` for processing and return the job ID.
+
+        The input is copied into the job directory, so the caller may delete
+        its own copy as soon as this returns.
+        """
+        job_id = self.job_id_for(input_path, start_page, end_page)
+        self.prune()
+        with self._lock:
+            return self._submit_locked(job_id, input_path, start_page, end_page)
+
+    def _submit_locked(
+        self, job_id: str, input_path: Union[str, Path], start_page: int, end_page: int
+    ) -> str:
+        """Create and queue the job unless an equivalent one already exists."""
+        job_dir = self.root / job_id
+        existing = _read_job(job_dir)
+        if existing is not None and existing.status != FAILED:
+            logger.info(f"Reusing job {job_id} ({existing.status})")
+            return job_id
+
+        job_dir.mkdir(exist_ok=True)
+        job = Job(
+            job_id=job_id,
+            input_path=str(job_dir / INPUT_FILE),
+            output_path=str(job_dir / OUTPUT_FILE),
+            start_page=start_page,
+            end_page=end_page,
+            owner=_owner_id(),
+        )
+        shutil.copyfile(input_path, job.input_path)
+        _write_job(job)
+
+        future = self.executor.submit(_run_job, str(job_dir))
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+        logger.info(f"Queued job {job_id} for pages {start_page}-{end_page}")
+        return job_id
+
+    def _on_done(self, job_id: str, future: Future) -> None:
+        """Record a failure if the worker died without updating the job."""
+        error = future.exception()
+        if error is None:
+            return
+        logger.error(f"Job {job_id} failed: {error}")
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.status = FAILED
+            job.error = str(error)
+            _write_job(job)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the current state of a job."""
+        return _read_job(self.root / job_id)
+
+    def remove(self, job_id: str) -> None:
+        """Delete a finished job and its files."""
+        job = self.get(job_id)
+        if job is not None and job.finished:
+            shutil.rmtree(self.root / job_id, ignore_errors=True)
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs and wait for running ones to finish."""
+        self.executor.shutdown(wait=True)
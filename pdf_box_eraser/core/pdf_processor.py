@@ -1,70 +1,345 @@
 """Core PDF processing functionality."""
 
 import pikepdf
-import pdf2image
 import tempfile
 import logging
+import os
 import re
-import gc
-from typing import Optional, Set, Dict, Union, List, Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional, Set, Dict, Union, List, Callable, Tuple, BinaryIO
 from pdf_box_eraser.utils.decorators import log_exceptions
-from pdf_box_eraser.core.box_remover import BoxRemover
+from pdf_box_eraser.utils.memory import GCPolicy
+from pdf_box_eraser.utils.instrumentation import Instrumentation, NullInstrumentation
+from pdf_box_eraser.core.box_remover import BoxRemover, ProcessingStats
+from pdf_box_eraser.core.geometry import RectFilter
+from pdf_box_eraser.core.spatial import PageRectIndex
+from pdf_box_eraser.core.stream_index import PlacementIndex
+from pdf_box_eraser.core.stream_cache import StreamCache
+from pdf_box_eraser.core.render_cache import RenderCache
+from pdf_box_eraser.core.incremental import write_incremental_update
+from pdf_box_eraser.core.document import PDFDocument, open_input
 
 logger = logging.getLogger(__name__)
 
+OBJECT_STREAM_MODES = {
+    "preserve": pikepdf.ObjectStreamMode.preserve,
+    "disable": pikepdf.ObjectStreamMode.disable,
+    "generate": pikepdf.ObjectStreamMode.generate,
+}
+
+# A path, or a document session that is already open
+PDFInput = Union[str, PDFDocument]
+
+ShardResult = Tuple[
+    Dict[Tuple[int, int], Tuple[bytes, int]], ProcessingStats, Optional[Instrumentation]
+]
+
+
+def _process_shard(
+    pdf_path: str,
+    start_page: int,
+    end_page: int,
+    stream_cache: Optional[StreamCache] = None,
+    instrument: bool = False,
+    patterns: Optional[List[bytes]] = None,
+    rect_filter: Optional[RectFilter] = None,
+    skip_streams: Optional[List[Tuple[int, int]]] = None,
+    placements: Optional[PlacementIndex] = None,
+    finish_streams: Optional[List[Tuple[int, int]]] = None,
+) -> ShardResult:
+    """Process a page shard in a worker process.
+
+    Only the rewritten content streams are sent back, keyed by objgen,
+    together with the number of boxes removed from each of them, and the
+    shard's instrumentation when ``instrument`` is set. ``skip_streams``
+    are shared streams another shard rewrites, and ``finish_streams`` the
+    shared streams this shard rewrites even if its pages do not draw them;
+    ``placements`` covers the whole job, so shared forms are filtered the
+    same in every shard.
+    """
+    instrumentation = Instrumentation() if instrument else None
+    box_remover = BoxRemover(
+        stream_cache, instrumentation=instrumentation, patterns=patterns, rect_filter=rect_filter
+    )
+    with open_input(pdf_path) as pdf:
+        box_remover.index_pages(pdf.pages[start_page - 1:end_page], placements)
+        if skip_streams:
+            box_remover.skip_streams(skip_streams, pdf)
+        for page_num in range(start_page, end_page + 1):
+            box_remover.process_page(pdf.pages[page_num - 1], page_num)
+        if finish_streams:
+            box_remover.finish_streams(finish_streams, pdf)
+
+        rewritten = {
+            objgen: (pdf.get_object(objgen).read_bytes(), boxes)
+            for objgen, boxes in box_remover.modified_streams.items()
+        }
+    box_remover.record_pattern_hits()
+    return rewritten, box_remover.stats, instrumentation
+
+
+def _render_page(pdf_path: str, page: int, dpi: int, output_folder: str):
+    """Rasterize one page through poppler and load it into memory."""
+    # Imported here so headless runs never load pdf2image and PIL
+    import pdf2image
+    from PIL import Image
+
+    (path,) = pdf2image.convert_from_path(
+        pdf_path,
+        dpi=dpi,
+        first_page=page,
+        last_page=page,
+        output_folder=output_folder,
+        fmt="png",
+        paths_only=True,
+    )
+    try:
+        image = Image.open(path)
+        image.load()
+        return image
+    finally:
+        os.unlink(path)
+
 
 class PDFProcessor:
     """Handles PDF processing and box removal operations."""
 
-    def __init__(self):
-        """Initialize the PDF processor."""
-        self.box_remover = BoxRemover()
+    def __init__(
+        self,
+        workers: int = 1,
+        shard_size: int = 50,
+        stream_cache: Optional[StreamCache] = None,
+        gc_policy: Optional[GCPolicy] = None,
+        render_cache: Optional[RenderCache] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        metrics_path: Optional[str] = None,
+        metrics_format: Optional[str] = None,
+        patterns: Optional[List[Union[str, bytes]]] = None,
+        rect_filter: Optional[RectFilter] = None,
+    ):
+        """Initialize the PDF processor.
+
+        Page ranges longer than ``shard_size`` are split across ``workers``
+        processes when more than one worker is configured. Rewritten streams
+        are looked up in and added to ``stream_cache`` when one is given.
+        Garbage collection between pages is left to ``gc_policy``. Rendered
+        page images are reused from ``render_cache`` when one is given.
+        Stage timings are recorded in ``instrumentation`` and written to
+        ``metrics_path`` (JSON or Prometheus text) after each run; giving a
+        path alone turns instrumentation on. Extra box ``patterns`` are
+        combined into one matcher applied after the built-in scan, and
+        ``rect_filter`` restricts which rectangles are removed.
+        """
+        self.stream_cache = stream_cache
+        self.render_cache = render_cache
+        self.gc_policy = gc_policy or GCPolicy()
+        if instrumentation is None:
+            instrumentation = Instrumentation() if metrics_path else NullInstrumentation()
+        self.instrumentation = instrumentation
+        self.metrics_path = metrics_path
+        self.metrics_format = metrics_format
+        self.box_remover = BoxRemover(
+            stream_cache, self.gc_policy, instrumentation,
+            patterns=patterns, rect_filter=rect_filter,
+        )
+        self.workers = max(1, workers)
+        self.shard_size = max(1, shard_size)
 
-    def get_total_pages(self, pdf_path: str) -> int:
+    def get_total_pages(self, pdf_input: PDFInput) -> int:
         """Get the total number of pages in a PDF."""
-        with pikepdf.open(pdf_path) as pdf:
-            return len(pdf.pages)
+        if isinstance(pdf_input, PDFDocument):
+            return pdf_input.page_count
+        with PDFDocument(pdf_input) as document:
+            return document.page_count
+
+    def index_page_rects(self, pdf_path: str, page_num: int) -> PageRectIndex:
+        """Build the spatial index of the rectangles on one page (1-based)."""
+        with open_input(pdf_path) as pdf:
+            return self.box_remover.index_page(pdf.pages[page_num - 1])
 
     def process_pdf_file(
         self,
-        pdf_path: str,
+        pdf_path: PDFInput,
         start_page: int,
         end_page: int,
         progress_callback: Optional[Callable] = None,
+        object_streams: str = "preserve",
+        linearize: bool = False,
+        incremental: bool = False,
     ) -> str:
         """Process a PDF file and return path to processed file."""
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_output:
+            self.process_pdf_to_stream(
+                pdf_path,
+                tmp_output,
+                start_page,
+                end_page,
+                progress_callback,
+                object_streams=object_streams,
+                linearize=linearize,
+                incremental=incremental,
+            )
+            return tmp_output.name
+
+    def process_pdf_to_stream(
+        self,
+        pdf_path: PDFInput,
+        output: Union[str, int, BinaryIO],
+        start_page: int = None,
+        end_page: int = None,
+        progress_callback: Optional[Callable] = None,
+        object_streams: str = "preserve",
+        linearize: bool = False,
+        incremental: bool = False,
+    ) -> None:
+        """Process a PDF file and write the result to ``output``.
+
+        ``output`` may be a path, a writable binary stream or an open file
+        descriptor; streams and descriptors are left open for the caller.
+        The processed document is closed as soon as it has been written so
+        the rewritten stream data does not outlive the save, unless it
+        belongs to a ``PDFDocument`` given by the caller, who then closes it.
+
+        With ``incremental`` the original bytes are copied unchanged and only
+        the rewritten streams are appended as an incremental update;
+        ``object_streams`` and ``linearize`` do not apply in that mode.
+        """
+        if incremental and linearize:
+            raise ValueError("An incremental update cannot be linearized")
+
         processed_pdf = self.process_pdf(
             pdf_path, start_page, end_page, progress_callback
         )
+        document = pdf_path if isinstance(pdf_path, PDFDocument) else None
+        if document is not None:
+            pdf_path = document.path
+        try:
+            with self.instrumentation.stage("save"):
+                if incremental and not processed_pdf.is_encrypted:
+                    self.save_incremental(pdf_path, processed_pdf, output)
+                else:
+                    if incremental:
+                        logger.warning(f"{pdf_path} is encrypted, writing a full copy instead")
+                    self.save_pdf(
+                        processed_pdf,
+                        output,
+                        object_streams=object_streams,
+                        linearize=linearize,
+                    )
+            # Export again so the file includes the save
+            self.export_metrics()
+        finally:
+            if document is None:
+                processed_pdf.close()
+            self.box_remover.modified_streams.clear()
 
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_output:
-            processed_pdf.save(tmp_output.name)
-            return tmp_output.name
+    def save_pdf(
+        self,
+        pdf: pikepdf.Pdf,
+        output: Union[str, int, BinaryIO],
+        object_streams: str = "preserve",
+        linearize: bool = False,
+    ) -> None:
+        """Write ``pdf`` to a path, binary stream or file descriptor.
+
+        ``object_streams`` is one of ``"preserve"``, ``"disable"`` or
+        ``"generate"``.
+        """
+        if object_streams not in OBJECT_STREAM_MODES:
+            raise ValueError(f"Unknown object stream mode: {object_streams}")
+
+        # Streams the remover did not touch are copied with their original
+        # encoding instead of being decoded and recompressed
+        save_options = dict(
+            object_stream_mode=OBJECT_STREAM_MODES[object_streams],
+            linearize=linearize,
+            stream_decode_level=pikepdf.StreamDecodeLevel.none,
+        )
+        if isinstance(output, int):
+            with os.fdopen(output, "wb", closefd=False) as stream:
+                pdf.save(stream, **save_options)
+                stream.flush()
+        else:
+            pdf.save(output, **save_options)
+
+    def export_metrics(self) -> None:
+        """Write the instrumentation to ``metrics_path`` if one is configured."""
+        if self.metrics_path and self.instrumentation.enabled:
+            try:
+                self.instrumentation.export(self.metrics_path, self.metrics_format)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not write metrics to {self.metrics_path}: {e}")
+
+    def save_incremental(
+        self,
+        pdf_path: str,
+        pdf: pikepdf.Pdf,
+        output: Union[str, int, BinaryIO],
+    ) -> None:
+        """Write ``pdf_path`` plus the streams rewritten in ``pdf`` to ``output``.
+
+        Raises ``ValueError`` if ``output`` is the input file itself: the
+        original bytes are copied from disk, so writing over them would
+        destroy the input before it is read.
+        """
+        modified = list(self.box_remover.modified_streams)
+        if isinstance(output, int):
+            if os.path.samestat(os.fstat(output), os.stat(pdf_path)):
+                raise ValueError(f"Cannot write an incremental update over its input {pdf_path}")
+            with os.fdopen(output, "wb", closefd=False) as stream:
+                write_incremental_update(pdf_path, pdf, modified, stream)
+        elif isinstance(output, (str, os.PathLike)):
+            if os.path.exists(output) and os.path.samefile(pdf_path, output):
+                raise ValueError(f"Cannot write an incremental update over its input {pdf_path}")
+            with open(output, "wb") as stream:
+                write_incremental_update(pdf_path, pdf, modified, stream)
+        else:
+            write_incremental_update(pdf_path, pdf, modified, output)
 
     def convert_pdf_to_images(
-        self, pdf_path: str, start_page: int, end_page: int
+        self, pdf_path: str, start_page: int, end_page: int, dpi: int = 200
     ) -> List:
-        """Convert PDF pages to images."""
-        return pdf2image.convert_from_path(
-            pdf_path, first_page=start_page, last_page=end_page
-        )
+        """Convert PDF pages to images, one page at a time."""
+        return [self.render_page(pdf_path, page, dpi) for page in range(start_page, end_page + 1)]
+
+    def render_page(self, pdf_path: str, page: int, dpi: int = 200):
+        """Render a single page on the calling thread, through the render cache."""
+        file_hash = self.render_cache.file_hash(pdf_path) if self.render_cache else None
+        image = self.render_cache.get(file_hash, page, dpi) if file_hash is not None else None
+        if image is None:
+            with tempfile.TemporaryDirectory(prefix="pdf_box_eraser_render_") as folder:
+                image = _render_page(pdf_path, page, dpi, folder)
+            if file_hash is not None:
+                self.render_cache.put(file_hash, page, dpi, image)
+        return image
 
     @log_exceptions
     def process_pdf(
         self,
-        pdf_path: str,
+        pdf_path: PDFInput,
         start_page: int = None,
         end_page: int = None,
         progress_callback: Optional[Callable] = None,
     ) -> pikepdf.Pdf:
-        """Process a PDF file to remove unwanted boxes."""
+        """Process a PDF file to remove unwanted boxes.
+
+        Given a ``PDFDocument``, its open handle is processed in place
+        instead of parsing the file again. State left by an earlier file,
+        including the statistics, is reset first, since objgens repeat
+        across documents.
+        """
+        self.box_remover.reset_state()
+        document = pdf_path if isinstance(pdf_path, PDFDocument) else None
+        if document is not None:
+            pdf_path = document.path
         logger.info(f"Processing PDF: {pdf_path}")
 
-        # Open PDF with specific options for better multi-page handling
-        pdf = pikepdf.open(
-            pdf_path, allow_overwriting_input=True, ignore_xref_streams=False
-        )
+        gc_before = self.gc_policy.report()
+
+        # The input stays mapped until the returned document is closed, so
+        # it must not be saved over its own input
+        with self.instrumentation.stage("open"):
+            pdf = document.pdf if document is not None else open_input(pdf_path)
 
         # Validate and adjust page range
         total_pages = len(pdf.pages)
@@ -80,11 +355,28 @@ class PDFProcessor:
         )
 
         try:
-            self._process_pages(pdf, start_page, end_page, progress_callback)
+            with self.instrumentation.stage("index"):
+                index = self.box_remover.index_pages(pdf.pages[start_page - 1:end_page])
+            logger.info(f"Found {len(index)} unique content streams")
+
+            if self.workers > 1 and end_page - start_page + 1 > self.shard_size:
+                self._process_pages_parallel(
+                    pdf, pdf_path, start_page, end_page, progress_callback
+                )
+            else:
+                self._process_pages(pdf, start_page, end_page, progress_callback)
         finally:
             # Log final statistics and cleanup
+            self.gc_policy.maybe_collect()
+            gc_after = self.gc_policy.report()
+            gc_seconds = gc_after["gc_seconds"] - gc_before["gc_seconds"]
+            self.instrumentation.add_stage(
+                "gc", gc_seconds, gc_seconds, gc_after["collections"] - gc_before["collections"]
+            )
+            self.box_remover.record_pattern_hits()
             logger.info(f"Processing complete. Statistics: {self.box_remover.stats}")
-            gc.collect()
+            logger.info(f"Garbage collection: {gc_after}")
+            self.export_metrics()
 
         return pdf
 
@@ -107,11 +399,107 @@ class PDFProcessor:
                     progress = (page_num - start_page + 1) / (end_page - start_page + 1)
                     progress_callback(progress, self.box_remover.stats)
 
-                # Cleanup
                 page = None
-                if page_num % 10 == 0:  # Every 10 pages
-                    gc.collect()
 
             except Exception as e:
                 logger.error(f"Error processing page {page_num}: {e}")
                 continue
+
+    def _process_pages_parallel(
+        self,
+        pdf: pikepdf.Pdf,
+        pdf_path: str,
+        start_page: int,
+        end_page: int,
+        progress_callback: Optional[Callable],
+    ) -> None:
+        """Process a range of pages in worker processes and merge the results.
+
+        Each worker opens its own handle on ``pdf_path``. Streams shared
+        between shards (such as common Form XObjects) are rewritten only by
+        the first shard whose pages may draw them, as found in the stream
+        index; the others skip them.
+        """
+        shards = [
+            (first, min(first + self.shard_size - 1, end_page))
+            for first in range(start_page, end_page + 1, self.shard_size)
+        ]
+        index = self.box_remover.stream_index
+        shard_pages = [
+            [pdf.pages[page_num - 1].objgen for page_num in range(first, last + 1)]
+            for first, last in shards
+        ]
+        owners = index.owners(shard_pages)
+        listed = [
+            {objgen for page in pages for objgen in index.page_streams.get(page, ())}
+            for pages in shard_pages
+        ]
+        skipped = [
+            sorted(objgen for objgen in streams if owners[objgen] != shard)
+            for shard, streams in enumerate(listed)
+        ]
+        # Streams a shard owns and others skip must be rewritten by it even
+        # if its own pages turn out not to draw them
+        shared = {objgen for skip in skipped for objgen in skip}
+        finishing = [
+            sorted(objgen for objgen in streams if owners[objgen] == shard and objgen in shared)
+            for shard, streams in enumerate(listed)
+        ]
+        logger.info(f"Processing {len(shards)} shards with {self.workers} workers")
+
+        stats = self.box_remover.stats
+        pattern_set = self.box_remover.pattern_set
+        rect_filter = self.box_remover.rect_filter
+        placements = (
+            self.box_remover.placements if rect_filter is not None and rect_filter.uses_placement else None
+        )
+        applied: Set[Tuple[int, int]] = set()
+        total = end_page - start_page + 1
+        done = 0
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(
+                    _process_shard,
+                    pdf_path,
+                    first,
+                    last,
+                    self.stream_cache,
+                    self.instrumentation.enabled,
+                    pattern_set.sources if pattern_set else None,
+                    self.box_remover.rect_filter,
+                    skip,
+                    placements,
+                    finish,
+                ): (first, last, skip, finish)
+                for (first, last), skip, finish in zip(shards, skipped, finishing)
+            }
+            for future in as_completed(futures):
+                first, last, skip, finish = futures[future]
+                try:
+                    rewritten, shard_stats, shard_instrumentation = future.result()
+                except Exception as e:
+                    logger.error(f"Worker failed on pages {first}-{last}, retrying in process: {e}")
+                    # Other shards, or their own retries, still own their streams
+                    skipped_here = self.box_remover.skip_streams(skip, pdf)
+                    try:
+                        self._process_pages(pdf, first, last, None)
+                        self.box_remover.finish_streams(finish, pdf)
+                    finally:
+                        self.box_remover.release_streams(skipped_here, pdf)
+                else:
+                    stats.merge(shard_stats)
+                    if shard_instrumentation is not None:
+                        self.instrumentation.merge(shard_instrumentation)
+                    for objgen, (content, boxes) in rewritten.items():
+                        if objgen in applied:
+                            stats.boxes_removed -= boxes
+                            continue
+                        pdf.get_object(objgen).write(content)
+                        self.box_remover.modified_streams[objgen] = boxes
+                        applied.add(objgen)
+
+                # Report progress
+                done += last - first + 1
+                if progress_callback:
+                    progress_callback(done / total, stats)
@@ -0,0 +1,83 @@
+"""Persistent cache of rendered page images."""
+
+import io
+import os
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Tuple, Union
+from pdf_box_eraser.utils.disk_cache import DiskLRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class RenderCache:
+    """Caches rasterized pages keyed by file content, page, DPI and format.
+
+    Images are stored compressed (PNG or WebP), so a preview of a document
+    that was already rendered once is a file read and a decode instead of a
+    poppler run.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        max_bytes: int = 256 * 1024 * 1024,
+        image_format: str = "PNG",
+    ):
+        """Initialize the cache in ``directory`` with a byte budget."""
+        self.store = DiskLRUCache(directory, max_bytes)
+        self.image_format = image_format.upper()
+        self._file_hashes: Dict[Tuple[str, int, float], str] = {}
+        self._lock = threading.Lock()
+
+    def file_hash(self, pdf_path: Union[str, Path]) -> str:
+        """Content hash of a PDF, remembered while its size and mtime hold."""
+        stat = os.stat(pdf_path)
+        identity = (os.fspath(pdf_path), stat.st_size, stat.st_mtime)
+        with self._lock:
+            cached = self._file_hashes.get(identity)
+        if cached is not None:
+            return cached
+
+        digest = hashlib.sha256()
+        with open(pdf_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        file_hash = digest.hexdigest()
+        with self._lock:
+            self._file_hashes[identity] = file_hash
+        return file_hash
+
+    def key_for(self, file_hash: str, page: int, dpi: int) -> str:
+        """Derive the entry key for one rendered page."""
+        return hashlib.sha256(
+            f"{file_hash}:{page}:{dpi}:{self.image_format}".encode()
+        ).hexdigest()
+
+    def has(self, file_hash: str, page: int, dpi: int) -> bool:
+        """Whether a render of the page is currently stored."""
+        return self.key_for(file_hash, page, dpi) in self.store
+
+    def get(self, file_hash: str, page: int, dpi: int):
+        """Return the cached image for a page, or None on a miss."""
+        data = self.store.get(self.key_for(file_hash, page, dpi))
+        if data is None:
+            return None
+
+        from PIL import Image
+
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.load()
+        except OSError as e:
+            logger.warning(f"Discarding unreadable render of page {page}: {e}")
+            return None
+        return image
+
+    def put(self, file_hash: str, page: int, dpi: int, image) -> None:
+        """Compress and store the image rendered for a page."""
+        buffer = io.BytesIO()
+        image.save(buffer, format=self.image_format)
+        self.store.set(self.key_for(file_hash, page, dpi), buffer.getvalue())
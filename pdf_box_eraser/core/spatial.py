@@ -0,0 +1,137 @@
+"""Grid index over rectangle bounding boxes for region queries."""
+
+import math
+import logging
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Region query modes: rectangles touching the region, or lying inside it
+REGION_MODES = ("intersect", "contain")
+
+# Bounds on the grid so a few huge or tiny boxes cannot blow it up
+MAX_GRID_CELLS = 1024
+MAX_CELLS_PER_BOX = 64
+
+
+class GridIndex:
+    """Uniform grid over ``x0 y0 x1 y1`` boxes.
+
+    Every box is filed under each cell it overlaps; boxes that would span
+    more than ``MAX_CELLS_PER_BOX`` cells are kept aside and checked on
+    every query instead. The cells are stored as one sorted array, so a
+    query only touches the cells the region covers and the boxes filed
+    there, independent of how many boxes the page holds.
+    """
+
+    def __init__(self, bbox: np.ndarray, cell_size: Optional[float] = None):
+        """Build the index; ``cell_size`` defaults to about one box per cell."""
+        self.bbox = np.asarray(bbox, dtype=np.float64).reshape(-1, 4)
+        count = len(self.bbox)
+        if count:
+            self.origin = self.bbox[:, :2].min(axis=0)
+            extent = np.maximum(self.bbox[:, 2:].max(axis=0) - self.origin, 1e-9)
+        else:
+            self.origin = np.zeros(2)
+            extent = np.ones(2)
+        if cell_size is None:
+            cell_size = math.sqrt(extent[0] * extent[1] / max(count, 1))
+        # Never more than MAX_GRID_CELLS cells along an axis
+        self.cell_size = max(cell_size, float(extent.max()) / MAX_GRID_CELLS, 1e-9)
+        self.shape = np.minimum(np.floor(extent / self.cell_size).astype(np.int64) + 1, MAX_GRID_CELLS)
+        self._build()
+
+    def _cells(self, lo: np.ndarray, hi: np.ndarray):
+        """Clamp coordinates to cell column and row ranges."""
+        first = np.floor((lo - self.origin) / self.cell_size).astype(np.int64)
+        last = np.floor((hi - self.origin) / self.cell_size).astype(np.int64)
+        upper = self.shape - 1
+        return np.clip(first, 0, upper), np.clip(last, 0, upper)
+
+    def _build(self) -> None:
+        """File each box under every cell it overlaps."""
+        first, last = self._cells(self.bbox[:, :2], self.bbox[:, 2:])
+        spans = last - first + 1
+        counts = spans[:, 0] * spans[:, 1]
+        large = counts > MAX_CELLS_PER_BOX
+        self.large = np.flatnonzero(large)
+
+        ids = np.flatnonzero(~large)
+        counts = counts[ids]
+        ids = np.repeat(ids, counts)
+        local = np.arange(len(ids)) - np.repeat(np.cumsum(counts) - counts, counts)
+        width = spans[ids, 0]
+        columns = first[ids, 0] + local % width
+        rows = first[ids, 1] + local // width
+        cells = rows * self.shape[0] + columns
+
+        order = np.argsort(cells, kind="stable")
+        self._ids = ids[order]
+        self._starts = np.searchsorted(cells[order], np.arange(self.shape[0] * self.shape[1] + 1))
+
+    def __len__(self) -> int:
+        """Number of indexed boxes."""
+        return len(self.bbox)
+
+    def candidates(self, region: Sequence[float]) -> np.ndarray:
+        """Indices of the boxes filed in the cells ``region`` overlaps."""
+        x0, y0, x1, y1 = region
+        first, last = self._cells(np.array([x0, y0]), np.array([x1, y1]))
+        columns = self.shape[0]
+        pieces = [self.large]
+        for row in range(first[1], last[1] + 1):
+            start = self._starts[row * columns + first[0]]
+            end = self._starts[row * columns + last[0] + 1]
+            pieces.append(self._ids[start:end])
+        return np.unique(np.concatenate(pieces))
+
+    def query(self, region: Sequence[float], mode: str = "intersect") -> np.ndarray:
+        """Sorted indices of the boxes that intersect or lie inside ``region``."""
+        if mode not in REGION_MODES:
+            raise ValueError(f"Unknown region mode: {mode}")
+        x0, y0, x1, y1 = region
+        if not len(self.bbox) or x1 < x0 or y1 < y0:
+            return np.empty(0, dtype=np.int64)
+        ids = self.candidates(region)
+        bx0, by0, bx1, by1 = self.bbox[ids].T
+        if mode == "contain":
+            hit = (bx0 >= x0) & (by0 >= y0) & (bx1 <= x1) & (by1 <= y1)
+        else:
+            hit = (bx0 <= x1) & (bx1 >= x0) & (by0 <= y1) & (by1 >= y0)
+        return ids[hit]
+
+    def mask(self, regions: Iterable[Sequence[float]], mode: str = "intersect") -> np.ndarray:
+        """Boolean mask of the boxes matching any of ``regions``."""
+        selected = np.zeros(len(self.bbox), dtype=bool)
+        for region in regions:
+            selected[self.query(region, mode)] = True
+        return selected
+
+
+@dataclass
+class PageRectIndex:
+    """Every removable rectangle on a page's content streams, indexed by position.
+
+    Row ``i`` of ``bbox`` (``x0 y0 x1 y1`` in default user space) was drawn
+    by the bytes ``spans[i]`` of the content stream ``objgens[streams[i]]``.
+    """
+    bbox: np.ndarray
+    streams: np.ndarray
+    spans: np.ndarray
+    objgens: List[Tuple[int, int]]
+    index: GridIndex
+
+    def __len__(self) -> int:
+        """Number of rectangles on the page."""
+        return len(self.bbox)
+
+    def query(self, region: Sequence[float], mode: str = "intersect") -> np.ndarray:
+        """Indices of the rectangles that intersect or lie inside ``region``."""
+        return self.index.query(region, mode)
+
+    def mask(self, regions: Iterable[Sequence[float]], mode: str = "intersect") -> np.ndarray:
+        """Boolean mask of the rectangles matching any of ``regions``."""
+        return self.index.mask(regions, mode)
@@ -0,0 +1,82 @@
+"""Persistent cache of rewritten content streams."""
+
+import json
+import hashlib
+import struct
+import logging
+import pikepdf
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+from pdf_box_eraser.utils.disk_cache import DiskLRUCache
+
+logger = logging.getLogger(__name__)
+
+# Entry layout: one flag byte, the box count, the decoded size of the
+# original stream, the length of the JSON hit counts per pattern, the hit
+# counts, then the rewritten content. Entries flagged ``\x01`` or ``\x02``
+# come from older layouts and are treated as misses.
+_UNCHANGED = b"\x00"
+_REWRITTEN = b"\x03"
+_HEADER = struct.Struct(">III")
+
+# A cached stream: ``(content, boxes, hits, original_size)``
+CachedStream = Tuple[Optional[bytes], int, Dict[str, int], int]
+
+
+class StreamCache:
+    """Caches the output of box removal keyed by raw stream bytes.
+
+    Streams that come from the same template are byte-identical across
+    documents, so the rewrite (or the fact that nothing changed) can be
+    looked up before the stream is even decoded.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = 512 * 1024 * 1024):
+        """Initialize the cache in ``directory`` with a byte budget."""
+        self.store = DiskLRUCache(directory, max_bytes)
+
+    @staticmethod
+    def key_for(stream: pikepdf.Stream, version: str) -> str:
+        """Hash the raw stream bytes, their filters and the pattern-set version."""
+        digest = hashlib.sha256()
+        digest.update(version.encode())
+        digest.update(str(stream.get("/Filter")).encode())
+        digest.update(str(stream.get("/DecodeParms")).encode())
+        digest.update(stream.read_raw_bytes())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[CachedStream]:
+        """Return ``(content, boxes, hits, original_size)`` for a cached stream.
+
+        Returns None on a miss. ``content`` is None when the stream is known
+        to need no changes; ``hits`` are the removals per pattern name and
+        ``original_size`` the decoded size of the stream before rewriting.
+        """
+        entry = self.store.get(key)
+        if not entry:
+            return None
+
+        if entry[:1] == _UNCHANGED:
+            return None, 0, {}, 0
+        if entry[:1] != _REWRITTEN:
+            return None
+        boxes, original_size, hits_size = _HEADER.unpack_from(entry, 1)
+        start = 1 + _HEADER.size
+        hits = json.loads(entry[start:start + hits_size])
+        return entry[start + hits_size:], boxes, hits, original_size
+
+    def put(
+        self,
+        key: str,
+        content: Optional[bytes],
+        boxes: int = 0,
+        hits: Optional[Dict[str, int]] = None,
+        original_size: int = 0,
+    ) -> None:
+        """Store a rewritten stream, or mark it unchanged when ``content`` is None."""
+        if content is None:
+            self.store.set(key, _UNCHANGED)
+        else:
+            encoded = json.dumps(hits or {}, sort_keys=True).encode()
+            header = _HEADER.pack(boxes, original_size, len(encoded))
+            self.store.set(key, _REWRITTEN + header + encoded + content)
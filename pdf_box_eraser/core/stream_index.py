@@ -0,0 +1,359 @@
+"""Document-level index of the content streams each page draws."""
+
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import pikepdf
+
+from pdf_box_eraser.core.geometry import (
+    IDENTITY,
+    Matrix,
+    Placement,
+    _multiply,
+    walk_graphics_state,
+)
+
+logger = logging.getLogger(__name__)
+
+ObjGen = Tuple[int, int]
+
+# Beyond this many distinct placements a stream counts as placed anywhere
+MAX_PLACEMENTS = 64
+# Forms nested deeper than this are not followed
+MAX_FORM_DEPTH = 16
+
+
+# Resource names a stream draws with ``Do``, or None when they are unknown
+NamesOf = Callable[[pikepdf.Stream], Optional[Iterable[str]]]
+
+
+class StreamIndex:
+    """Which content streams every page may draw, deduplicated by objgen.
+
+    Pages are walked through their resources to every Form XObject (found
+    by ``/Subtype``, whatever its resource name) and every soft mask
+    transparency group (``/SMask`` -> ``/G`` in an ExtGState), recursing
+    into their own resources, without decoding anything. Resource
+    dictionaries and forms are indirect objects shared between pages, so
+    their results are memoized by objgen and each one is walked once per
+    document no matter how many pages use it.
+
+    ``drawn_streams`` narrows a page down to the forms its streams draw,
+    from ``Do`` names the caller reads off bytes it decodes anyway. A
+    page's streams are listed dependencies first: nested forms come before
+    the forms and page contents that draw them.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self.streams: Dict[ObjGen, pikepdf.Stream] = {}
+        self.page_streams: Dict[ObjGen, Tuple[ObjGen, ...]] = {}
+        self._resources: Dict[ObjGen, Tuple[ObjGen, ...]] = {}
+        self._forms: Dict[ObjGen, Tuple[ObjGen, ...]] = {}
+        self._scopes: Dict[ObjGen, Tuple[Dict[str, pikepdf.Stream], Tuple[pikepdf.Stream, ...]]] = {}
+
+    def __len__(self) -> int:
+        """Number of unique content streams found."""
+        return len(self.streams)
+
+    def add_pages(self, pages: Iterable[pikepdf.Page]) -> None:
+        """Index several pages."""
+        for page in pages:
+            self.add_page(page)
+
+    def add_page(self, page: pikepdf.Page) -> Tuple[ObjGen, ...]:
+        """Index a page (once) and return the objgens of the streams it may draw."""
+        key = page.objgen
+        found = self.page_streams.get(key)
+        if found is not None:
+            return found
+
+        found = list(self._resource_streams(page.get("/Resources")))
+        for stream in self._contents(page):
+            found.append(self._register(stream))
+
+        found = tuple(dict.fromkeys(found))
+        if key != (0, 0):
+            self.page_streams[key] = found
+        return found
+
+    def drawn_streams(self, page: pikepdf.Page, names_of: NamesOf) -> Tuple[ObjGen, ...]:
+        """Objgens of the streams the page draws, following its ``Do`` calls.
+
+        ``names_of`` gives the resource names a stream draws, or None when
+        they are unknown (the stream was not decoded), in which case every
+        form in its resources counts as drawn. Soft mask groups in scope
+        always do. Forms without resources of their own draw from their
+        caller's.
+        """
+        found: Dict[ObjGen, None] = {}
+        resources = page.get("/Resources")
+        for stream in self._contents(page):
+            self._follow(stream, resources, names_of, found, set(), 0)
+        return tuple(found)
+
+    def owners(self, page_groups: Iterable[Iterable[ObjGen]]) -> Dict[ObjGen, int]:
+        """Assign every stream to the first group of pages that may draw it.
+
+        Used to give each shared stream to exactly one batch of pages.
+        """
+        owner: Dict[ObjGen, int] = {}
+        for group, pages in enumerate(page_groups):
+            for page in pages:
+                for objgen in self.page_streams.get(page, ()):
+                    owner.setdefault(objgen, group)
+        return owner
+
+    @staticmethod
+    def _contents(page: pikepdf.Page) -> List[pikepdf.Stream]:
+        """The parts of a page's ``/Contents``."""
+        contents = page.get("/Contents")
+        parts = contents if isinstance(contents, pikepdf.Array) else [contents]
+        return [stream for stream in parts if isinstance(stream, pikepdf.Stream)]
+
+    def _register(self, stream: pikepdf.Stream) -> ObjGen:
+        """Record a stream under its objgen."""
+        key = stream.objgen
+        self.streams.setdefault(key, stream)
+        return key
+
+    def _follow(
+        self,
+        stream: pikepdf.Stream,
+        resources: Optional[pikepdf.Object],
+        names_of: NamesOf,
+        found: Dict[ObjGen, None],
+        visiting: Set[ObjGen],
+        depth: int,
+    ) -> None:
+        """Add the streams ``stream`` draws from ``resources``, then the stream itself."""
+        key = stream.objgen
+        if key in found or key in visiting:
+            return
+        visiting.add(key)
+
+        forms, groups = self._scope(resources)
+        names = names_of(stream)
+        if names is None:
+            drawn = list(forms.values())
+        else:
+            drawn = [forms[name] for name in sorted(names) if name in forms]
+        if depth < MAX_FORM_DEPTH:
+            for form in drawn + list(groups):
+                inner = form.get("/Resources")
+                if not isinstance(inner, pikepdf.Dictionary):
+                    inner = resources
+                self._follow(form, inner, names_of, found, visiting, depth + 1)
+        elif drawn or groups:
+            logger.debug("Not following forms nested deeper than %s", MAX_FORM_DEPTH)
+
+        visiting.discard(key)
+        found[self._register(stream)] = None
+
+    def _scope(
+        self, resources: Optional[pikepdf.Object]
+    ) -> Tuple[Dict[str, pikepdf.Stream], Tuple[pikepdf.Stream, ...]]:
+        """Forms by resource name and soft mask groups of a resource dictionary.
+
+        Memoized when the dictionary is indirect.
+        """
+        if not isinstance(resources, pikepdf.Dictionary):
+            return {}, ()
+        key = resources.objgen
+        found = self._scopes.get(key) if key != (0, 0) else None
+        if found is not None:
+            return found
+
+        forms: Dict[str, pikepdf.Stream] = {}
+        xobjects = resources.get("/XObject")
+        if isinstance(xobjects, pikepdf.Dictionary):
+            for name, xobject in xobjects.items():
+                try:
+                    if isinstance(xobject, pikepdf.Stream) and xobject.get("/Subtype") == "/Form":
+                        forms[name] = xobject
+                except Exception as e:
+                    logger.debug("Skipping problematic XObject %s: %s", name, e)
+
+        groups: List[pikepdf.Stream] = []
+        extgstates = resources.get("/ExtGState")
+        if isinstance(extgstates, pikepdf.Dictionary):
+            for name, gstate in extgstates.items():
+                try:
+                    smask = gstate.get("/SMask") if isinstance(gstate, pikepdf.Dictionary) else None
+                    group = smask.get("/G") if isinstance(smask, pikepdf.Dictionary) else None
+                    if isinstance(group, pikepdf.Stream):
+                        groups.append(group)
+                except Exception as e:
+                    logger.debug("Skipping problematic ExtGState %s: %s", name, e)
+
+        found = (forms, tuple(groups))
+        if key != (0, 0):
+            self._scopes[key] = found
+        return found
+
+    def _resource_streams(self, resources: Optional[pikepdf.Object]) -> Tuple[ObjGen, ...]:
+        """Streams reachable from a resource dictionary, memoized when indirect."""
+        if not isinstance(resources, pikepdf.Dictionary):
+            return ()
+        key = resources.objgen
+        if key != (0, 0):
+            found = self._resources.get(key)
+            if found is not None:
+                return found
+            # Placeholder so a resource cycle ends here
+            self._resources[key] = ()
+
+        forms, groups = self._scope(resources)
+        found: List[ObjGen] = []
+        for form in list(forms.values()) + list(groups):
+            found.extend(self._form_streams(form))
+
+        found = tuple(dict.fromkeys(found))
+        if key != (0, 0):
+            self._resources[key] = found
+        return found
+
+    def _form_streams(self, form: pikepdf.Stream) -> Tuple[ObjGen, ...]:
+        """A form's nested streams followed by the form itself, memoized.
+
+        A form without resources of its own draws from its caller's, whose
+        streams are already listed.
+        """
+        key = form.objgen
+        found = self._forms.get(key)
+        if found is not None:
+            return found
+        self._forms[key] = (key,)
+        self._register(form)
+
+        nested = self._resource_streams(form.get("/Resources"))
+        found = tuple(dict.fromkeys(nested + (key,)))
+        self._forms[key] = found
+        return found
+
+
+class PlacementIndex:
+    """Where on its pages every content stream is drawn.
+
+    Page contents are walked in ``/Contents`` order, each part starting
+    from the CTM and saved states the previous part left behind. Every
+    ``/Name Do`` that resolves to a Form XObject places that form at its
+    ``/Matrix`` times the CTM at the call, and the form's own content is
+    walked from there for nested forms. A form's ``Do`` calls are memoized
+    relative to its own space, so each form is decoded once. Streams drawn
+    at more than ``MAX_PLACEMENTS`` places, and streams never reached
+    through ``Do`` such as soft mask groups, have no known placement.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self.placements: Dict[ObjGen, Set[Placement]] = {}
+        self.overflow: Set[ObjGen] = set()
+        self.pages: Set[ObjGen] = set()
+        self._invocations: Dict[ObjGen, List[Tuple[str, Matrix]]] = {}
+
+    def __contains__(self, page: pikepdf.Page) -> bool:
+        """Whether ``page`` has been walked."""
+        return page.objgen in self.pages
+
+    def get(self, objgen: ObjGen) -> Tuple[Placement, ...]:
+        """Known placements of a stream, sorted; empty when unknown."""
+        if objgen in self.overflow:
+            return ()
+        return tuple(sorted(self.placements.get(objgen, ()), key=repr))
+
+    def add_pages(self, pages: Iterable[pikepdf.Page]) -> None:
+        """Walk several pages."""
+        for page in pages:
+            self.add_page(page)
+
+    def add_page(self, page: pikepdf.Page) -> None:
+        """Record the placements of the page's contents and the forms they draw."""
+        if page.objgen in self.pages:
+            return
+        if page.objgen != (0, 0):
+            self.pages.add(page.objgen)
+
+        page_box = tuple(float(v) for v in page.mediabox)
+        resources = page.get("/Resources")
+        contents = page.get("/Contents")
+        ctm, stack = IDENTITY, ()
+        for stream in contents if isinstance(contents, pikepdf.Array) else [contents]:
+            if not isinstance(stream, pikepdf.Stream):
+                continue
+            self._place(stream.objgen, Placement(ctm, stack, page_box))
+            try:
+                walk = walk_graphics_state(stream.read_bytes(), ctm, stack)
+            except Exception as e:
+                logger.debug("Skipping unreadable content stream %s: %s", stream.objgen, e)
+                continue
+            self._place_forms(walk.invocations, resources, page_box, 0)
+            ctm, stack = walk.ctm, walk.stack
+
+    def _place(self, objgen: ObjGen, placement: Placement) -> bool:
+        """Record a placement; False if it was known or the stream overflowed."""
+        if objgen in self.overflow:
+            return False
+        found = self.placements.setdefault(objgen, set())
+        if placement in found:
+            return False
+        if len(found) >= MAX_PLACEMENTS:
+            logger.debug("Stream %s is drawn at too many places", objgen)
+            self.overflow.add(objgen)
+            del self.placements[objgen]
+            return False
+        found.add(placement)
+        return True
+
+    def _place_forms(
+        self,
+        invocations: Iterable[Tuple[str, Matrix]],
+        resources: Optional[pikepdf.Object],
+        page_box: Tuple[float, float, float, float],
+        depth: int,
+    ) -> None:
+        """Place the forms drawn by ``Do`` calls and, recursively, their nested forms."""
+        xobjects = resources.get("/XObject") if isinstance(resources, pikepdf.Dictionary) else None
+        if not isinstance(xobjects, pikepdf.Dictionary):
+            return
+        for name, ctm in invocations:
+            form = xobjects.get(name)
+            if not isinstance(form, pikepdf.Stream) or form.get("/Subtype") != "/Form":
+                continue
+            ctm = _multiply(self._form_matrix(form), ctm)
+            if not self._place(form.objgen, Placement(ctm, (), page_box)):
+                continue
+            if depth >= MAX_FORM_DEPTH:
+                logger.debug("Not following forms nested deeper than %s", MAX_FORM_DEPTH)
+                continue
+            nested = [(inner, _multiply(local, ctm)) for inner, local in self._form_invocations(form)]
+            # Forms without resources of their own inherit the caller's
+            inner_resources = form.get("/Resources")
+            if not isinstance(inner_resources, pikepdf.Dictionary):
+                inner_resources = resources
+            self._place_forms(nested, inner_resources, page_box, depth + 1)
+
+    def _form_invocations(self, form: pikepdf.Stream) -> List[Tuple[str, Matrix]]:
+        """A form's ``Do`` calls with CTMs relative to its own space, memoized."""
+        key = form.objgen
+        found = self._invocations.get(key)
+        if found is None:
+            try:
+                found = walk_graphics_state(form.read_bytes()).invocations
+            except Exception as e:
+                logger.debug("Skipping unreadable form %s: %s", key, e)
+                found = []
+            if key != (0, 0):
+                self._invocations[key] = found
+        return found
+
+    @staticmethod
+    def _form_matrix(form: pikepdf.Stream) -> Matrix:
+        """The form's ``/Matrix``, identity when absent or malformed."""
+        matrix = form.get("/Matrix")
+        if isinstance(matrix, pikepdf.Array) and len(matrix) == 6:
+            try:
+                return tuple(float(v) for v in matrix)
+            except (TypeError, ValueError):
+                pass
+        return IDENTITY
@@ -0,0 +1,81 @@
+"""On-demand page preview rendering for the UI."""
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Optional, Tuple
+from pdf_box_eraser.core.pdf_processor import PDFProcessor
+from pdf_box_eraser.core.render_cache import RenderCache
+
+logger = logging.getLogger(__name__)
+
+PreviewKey = Tuple[str, int, int]
+
+
+class PreviewRenderer:
+    """Renders single pages in the background and keeps the most recent few.
+
+    Only pages that are asked for are rasterized, one at a time, so memory
+    stays bounded by ``max_pages`` images no matter how long the range is.
+    Renderers may share one ``executor``; otherwise each starts its own
+    ``workers`` threads.
+    """
+
+    def __init__(
+        self,
+        dpi: int = 72,
+        max_pages: int = 8,
+        workers: int = 2,
+        render_cache: Optional[RenderCache] = None,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ):
+        """Initialize the renderer with a preview resolution and page budget."""
+        self.dpi = dpi
+        self.max_pages = max_pages
+        self.processor = PDFProcessor(render_cache=render_cache)
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=workers)
+        self._pages: "OrderedDict[PreviewKey, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _render(self, pdf_path: str, page: int):
+        """Rasterize one page at the preview resolution on the calling worker thread."""
+        return self.processor.render_page(pdf_path, page, dpi=self.dpi)
+
+    @staticmethod
+    def _failed(future: Future) -> bool:
+        """Whether a render was cancelled or raised, so it should be retried."""
+        return future.cancelled() or (future.done() and future.exception() is not None)
+
+    def request(self, pdf_path: str, page: int) -> Future:
+        """Start rendering a page unless it is already rendered or pending."""
+        key = (pdf_path, page, self.dpi)
+        with self._lock:
+            future = self._pages.get(key)
+            if future is None or self._failed(future):
+                future = self.executor.submit(self._render, pdf_path, page)
+                self._pages[key] = future
+            self._pages.move_to_end(key)
+
+            while len(self._pages) > self.max_pages:
+                _, stale = self._pages.popitem(last=False)
+                stale.cancel()
+        return future
+
+    def get(self, pdf_path: str, page: int):
+        """Return the preview image for a page, waiting for it if needed."""
+        return self.request(pdf_path, page).result()
+
+    def prefetch(self, pdf_path: str, pages: Iterable[int]) -> None:
+        """Queue pages the user is likely to look at next."""
+        for page in pages:
+            self.request(pdf_path, page)
+
+    def shutdown(self) -> None:
+        """Drop pending renders and stop the worker threads unless they are shared."""
+        with self._lock:
+            for future in self._pages.values():
+                future.cancel()
+            self._pages.clear()
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
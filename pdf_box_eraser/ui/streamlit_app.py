@@ -1,10 +1,48 @@
 """Streamlit UI for PDF Box Eraser."""
 import streamlit as st
 import tempfile
+import shutil
+import time
 import os
-from typing import Callable, Dict, Tuple, List
+from typing import Callable, Dict, Tuple
 from dataclasses import dataclass
-from pdf_box_eraser.core.pdf_processor import PDFProcessor
+from concurrent.futures import ThreadPoolExecutor
+from pdf_box_eraser.core.document import PDFDocument
+from pdf_box_eraser.ui.preview import PreviewRenderer
+from pdf_box_eraser.core.render_cache import RenderCache
+from pdf_box_eraser.core.jobs import DEFAULT_JOB_DIR, Job, JobQueue, QUEUED, FAILED
+
+# st.rerun replaced st.experimental_rerun in Streamlit 1.27
+rerun = getattr(st, "rerun", None) or st.experimental_rerun
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """Job queue shared by every session of this server."""
+    return JobQueue(
+        os.environ.get("PDF_BOX_ERASER_JOB_DIR", DEFAULT_JOB_DIR),
+        max_workers=int(os.environ.get("PDF_BOX_ERASER_WORKERS", 2)),
+        retention=float(os.environ.get("PDF_BOX_ERASER_JOB_RETENTION_HOURS", 24)) * 3600,
+    )
+
+@st.cache_resource
+def get_render_cache() -> RenderCache:
+    """Rendered-page cache shared by every session of this server."""
+    return RenderCache(
+        os.environ.get(
+            "PDF_BOX_ERASER_RENDER_CACHE_DIR",
+            os.path.join(tempfile.gettempdir(), "pdf_box_eraser_renders"),
+        ),
+        max_bytes=int(os.environ.get("PDF_BOX_ERASER_RENDER_CACHE_MB", 256)) * 1024 * 1024,
+        image_format=os.environ.get("PDF_BOX_ERASER_RENDER_FORMAT", "PNG"),
+    )
+
+@st.cache_resource
+def get_preview_executor() -> ThreadPoolExecutor:
+    """Preview render threads shared by every session of this server."""
+    return ThreadPoolExecutor(
+        max_workers=int(os.environ.get("PDF_BOX_ERASER_PREVIEW_WORKERS", 2)),
+        thread_name_prefix="preview",
+    )
 
 @dataclass
 class UIConstants:
@@ -20,6 +58,10 @@ class UIConstants:
     }
     PREVIEW_COLUMNS = 2
     STATS_COLUMNS = 3
+    POLL_INTERVAL = 0.5
+    PREVIEW_DPI = 72
+    PREFETCH_PAGES = 2
+    UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 class PDFBoxEraserUI:
     """Handles the Streamlit UI for PDF Box Eraser."""
@@ -90,19 +132,54 @@ class PDFBoxEraserUI:
         
         return update_progress
     
-    def display_page_preview(self, original_images: List, processed_images: List, start_page: int):
-        """Display side-by-side preview of original and processed pages."""
-        for i, (orig_img, proc_img) in enumerate(zip(original_images, processed_images)):
-            st.write(f"Page {start_page + i}")
-            col1, col2 = st.columns(UIConstants.PREVIEW_COLUMNS)
-            
-            with col1:
-                st.write("Original")
-                st.image(orig_img, use_container_width=True)
-            
-            with col2:
-                st.write("Processed")
-                st.image(proc_img, use_container_width=True)
+    def get_preview_renderer(self) -> PreviewRenderer:
+        """Preview renderer of the current session, on the server's shared threads."""
+        if 'preview_renderer' not in st.session_state:
+            st.session_state['preview_renderer'] = PreviewRenderer(
+                dpi=UIConstants.PREVIEW_DPI,
+                render_cache=get_render_cache(),
+                executor=get_preview_executor()
+            )
+        return st.session_state['preview_renderer']
+    
+    def display_page_preview(self, job: Job):
+        """Display side-by-side preview of one original and processed page."""
+        if job.end_page > job.start_page:
+            page = st.slider(
+                "Preview page",
+                min_value=job.start_page,
+                max_value=job.end_page,
+                value=job.start_page,
+                key=f"preview_page_{job.job_id}"
+            )
+        else:
+            page = job.start_page
+        
+        renderer = self.get_preview_renderer()
+        # Start both sides before waiting on either
+        renderer.request(job.input_path, page)
+        renderer.request(job.output_path, page)
+        
+        st.write(f"Page {page}")
+        col1, col2 = st.columns(UIConstants.PREVIEW_COLUMNS)
+        
+        with col1:
+            st.write("Original")
+            st.image(renderer.get(job.input_path, page), use_container_width=True)
+        
+        with col2:
+            st.write("Processed")
+            st.image(renderer.get(job.output_path, page), use_container_width=True)
+        
+        # Render the neighbours while the user looks at this page
+        neighbours = [
+            p for p in range(page + 1, page + 1 + UIConstants.PREFETCH_PAGES)
+            if p <= job.end_page
+        ]
+        if page > job.start_page:
+            neighbours.append(page - 1)
+        for path in (job.input_path, job.output_path):
+            renderer.prefetch(path, neighbours)
     
     def display_stats(self, stats: Dict):
         """Display processing statistics."""
@@ -134,82 +211,116 @@ class PDFBoxEraserUI:
             st.progress(progress)
             st.text(f"Progress: {progress:.1%}")
     
-    def handle_pdf_processing(self, input_path: str, start_page: int, end_page: int) -> Tuple[str, List, List]:
-        """Handle PDF processing and preview generation."""
-        processor = PDFProcessor()
-        progress_components = self.create_progress_components()
-        progress_callback = self.create_progress_callback(progress_components)
-        
-        # Process PDF
-        output_path = processor.process_pdf_file(
-            input_path, 
-            start_page, 
-            end_page,
-            progress_callback
-        )
+    def display_job(self, job_id: str):
+        """Show the state of a job, polling until it finishes."""
+        job = get_job_queue().get(job_id)
+        if job is None:
+            st.session_state.pop('job_id', None)
+            return
         
-        # Generate previews
-        original_images = processor.convert_pdf_to_images(
-            input_path,
-            start_page,
-            end_page
-        )
-        processed_images = processor.convert_pdf_to_images(
-            output_path,
-            start_page,
-            end_page
-        )
+        if not job.finished:
+            progress_components = self.create_progress_components()
+            if job.stats:
+                self.create_progress_callback(progress_components)(job.progress, job.stats)
+            st.info("Waiting for a worker..." if job.status == QUEUED else "Processing PDF...")
+            time.sleep(UIConstants.POLL_INTERVAL)
+            rerun()
+            return
         
-        return output_path, original_images, processed_images
+        if job.status == FAILED:
+            st.error(f"An error occurred while processing the PDF: {job.error}")
+            return
+        
+        st.success("Processing complete!")
+        self.display_page_preview(job)
+        self.display_stats(job.stats)
+        
+        # Processing and saving run in bounded memory, but this download does
+        # not: Streamlit reads the whole file into server memory before
+        # serving it, once per session that shows the button. Very large
+        # outputs are better fetched from the job directory directly.
+        with open(job.output_path, 'rb') as f:
+            st.download_button(
+                label="Download processed PDF",
+                data=f,
+                file_name='processed.pdf',
+                mime='application/pdf'
+            )
     
     def handle_file_upload(self):
-        """Handle PDF file upload and processing."""
+        """Handle PDF file upload and job submission."""
         uploaded_file = st.file_uploader("Choose a PDF file", type=['pdf'])
         
         if uploaded_file is None:
+            self.release_upload()
             return
             
         try:
-            # Save uploaded file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_input:
-                tmp_input.write(uploaded_file.getvalue())
-                input_path = tmp_input.name
-            
-            processor = PDFProcessor()
-            total_pages = processor.get_total_pages(input_path)
+            document = self.get_upload_document(uploaded_file)
+            total_pages = document.page_count
             
             # Page range selection
+            title = document.metadata.get('/Title')
+            if title:
+                st.write(f"**{title}**")
             st.write(f"Total pages in PDF: {total_pages}")
             start_page, end_page = self.get_page_range(total_pages)
             
             if st.button("Process PDF"):
-                with st.spinner('Processing PDF...'):
-                    try:
-                        output_path, original_images, processed_images = self.handle_pdf_processing(
-                            input_path, start_page, end_page
-                        )
-                        
-                        st.success("Processing complete!")
-                        self.display_page_preview(original_images, processed_images, start_page)
-                        
-                        # Create download button
-                        with open(output_path, 'rb') as f:
-                            st.download_button(
-                                label="Download processed PDF",
-                                data=f.read(),
-                                file_name='processed.pdf',
-                                mime='application/pdf'
-                            )
-                    finally:
-                        # Cleanup temporary files
-                        if 'output_path' in locals():
-                            os.unlink(output_path)
-                        os.unlink(input_path)
+                # The queue copies the input into the job directory
+                st.session_state['job_id'] = get_job_queue().submit(
+                    document.path, start_page, end_page
+                )
         
         except Exception as e:
             st.error(f"An error occurred while processing the PDF: {str(e)}")
-            if 'input_path' in locals():
-                os.unlink(input_path)
+        
+        if 'job_id' in st.session_state:
+            self.display_job(st.session_state['job_id'])
+    
+    def get_upload_document(self, uploaded_file) -> PDFDocument:
+        """Spool and parse an upload once, reusing it on every rerun.
+
+        The page count and metadata are read on the first run and the
+        handle is closed again; the spooled file stays on disk for job
+        submission until the upload is replaced or removed.
+        """
+        key = getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+        upload = st.session_state.get('upload')
+        if upload is not None and upload[0] == key:
+            return upload[1]
+        self.release_upload()
+        
+        # Spool the upload to disk in chunks rather than one big copy
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_input:
+            uploaded_file.seek(0)
+            shutil.copyfileobj(uploaded_file, tmp_input, UIConstants.UPLOAD_CHUNK_SIZE)
+        
+        document = PDFDocument(tmp_input.name)
+        try:
+            # Both are remembered by the document after this first read
+            document.page_count
+            document.metadata
+        except Exception:
+            os.unlink(document.path)
+            raise
+        finally:
+            document.close()
+        st.session_state['upload'] = (key, document)
+        return document
+    
+    def release_upload(self):
+        """Forget the previous upload's job and previews and delete its spooled copy, if any."""
+        st.session_state.pop('job_id', None)
+        renderer = st.session_state.pop('preview_renderer', None)
+        if renderer is not None:
+            renderer.shutdown()
+        upload = st.session_state.pop('upload', None)
+        if upload is not None:
+            try:
+                os.unlink(upload[1].path)
+            except FileNotFoundError:
+                pass
     
     def get_page_range(self, total_pages: int) -> Tuple[int, int]:
         """Get page range selection from user."""
@@ -0,0 +1,95 @@
+"""Size-bounded on-disk LRU cache."""
+import os
+import logging
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class DiskLRUCache:
+    """Stores byte values in files named by key, evicting least recently used.
+
+    Recency is tracked through file modification times, so several processes
+    can share one cache directory. When the total size goes over
+    ``max_bytes`` the oldest entries are removed until the cache is back
+    under ``low_water`` of the budget.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int, low_water: float = 0.9):
+        """Initialize the cache in ``directory`` with a byte budget."""
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._size = self._scan_size()
+
+    def _path(self, key: str) -> Path:
+        """Get the file path for a hex key."""
+        return self.directory / key[:2] / key
+
+    def _scan_size(self) -> int:
+        """Total size of all entries currently on disk."""
+        return sum(path.stat().st_size for path in self.directory.glob("*/*") if path.is_file())
+
+    def __contains__(self, key: str) -> bool:
+        """Whether an entry for ``key`` exists, without touching its recency."""
+        return self._path(key).is_file()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the value stored under ``key`` and mark it as recently used."""
+        path = self._path(key)
+        try:
+            value = path.read_bytes()
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Could not read cache entry {key}: {e}")
+            return None
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store ``value`` under ``key``, evicting old entries if needed."""
+        if len(value) > self.max_bytes:
+            return
+
+        path = self._path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+            os.replace(tmp_name, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {key}: {e}")
+            return
+
+        self._size += len(value)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until under the low-water mark."""
+        entries = []
+        for path in self.directory.glob("*/*"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        size = sum(entry[1] for entry in entries)
+        target = self.max_bytes * self.low_water
+        for _, entry_size, path in sorted(entries, key=lambda entry: entry[0]):
+            if size <= target:
+                break
+            try:
+                path.unlink()
+                size -= entry_size
+            except OSError:
+                continue
+
+        logger.debug(f"Cache eviction in {self.directory}: {self._size} -> {size} bytes")
+        self._size = size
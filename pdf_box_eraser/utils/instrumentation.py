@@ -0,0 +1,169 @@
+"""Per-stage timing and counters for processing runs."""
+import json
+import time
+import logging
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+_NULL_STAGE = nullcontext()
+
+
+@dataclass
+class StageTiming:
+    """Accumulated time spent in one processing stage."""
+    calls: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+
+
+@dataclass
+class PatternStats:
+    """Hits of one box pattern.
+
+    Patterns share one combined scan, so their time is only known together,
+    as the ``patterns`` stage.
+    """
+    hits: int = 0
+
+
+class Instrumentation:
+    """Records wall and CPU time per stage, stream byte counts and pattern hits.
+
+    Stages may nest (``page`` contains ``detect``, ``decode`` and so on), so
+    the time of an outer stage includes its inner ones. Use
+    ``NullInstrumentation`` when nothing should be recorded.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        """Initialize empty counters."""
+        self.stages: Dict[str, StageTiming] = {}
+        self.patterns: Dict[str, PatternStats] = {}
+        self.streams = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as part of stage ``name``."""
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def add_stage(self, name: str, wall_seconds: float, cpu_seconds: float, calls: int = 1) -> None:
+        """Add externally measured time to stage ``name``."""
+        timing = self.stages.get(name)
+        if timing is None:
+            timing = self.stages[name] = StageTiming()
+        timing.calls += calls
+        timing.wall_seconds += wall_seconds
+        timing.cpu_seconds += cpu_seconds
+
+    def record_stream(self, bytes_in: int, bytes_out: int) -> None:
+        """Count one rewritten stream with its decoded size before and after."""
+        self.streams += 1
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+
+    def record_pattern(self, name: str, hits: int) -> None:
+        """Add hits to pattern ``name``."""
+        stats = self.patterns.get(name)
+        if stats is None:
+            stats = self.patterns[name] = PatternStats()
+        stats.hits += hits
+
+    def merge(self, other: "Instrumentation") -> None:
+        """Add the counters recorded by another instance, e.g. a worker's."""
+        for name, timing in other.stages.items():
+            self.add_stage(name, timing.wall_seconds, timing.cpu_seconds, timing.calls)
+        for name, stats in other.patterns.items():
+            self.record_pattern(name, stats.hits)
+        self.streams += other.streams
+        self.bytes_in += other.bytes_in
+        self.bytes_out += other.bytes_out
+
+    def to_dict(self) -> Dict:
+        """Plain dictionary form of everything recorded."""
+        return {
+            "stages": {name: asdict(timing) for name, timing in self.stages.items()},
+            "patterns": {name: asdict(stats) for name, stats in self.patterns.items()},
+            "streams": {
+                "count": self.streams,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+            },
+        }
+
+    def to_json(self) -> str:
+        """Serialize the counters as JSON."""
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = "pdf_box_eraser") -> str:
+        """Serialize the counters in the Prometheus text exposition format."""
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+
+        stages = sorted(self.stages.items())
+        patterns = sorted(self.patterns.items())
+        metric("stage_calls_total", "counter", "Times each stage ran.",
+               [(f'{{stage="{name}"}}', t.calls) for name, t in stages])
+        metric("stage_wall_seconds_total", "counter", "Wall time spent per stage.",
+               [(f'{{stage="{name}"}}', f"{t.wall_seconds:.6f}") for name, t in stages])
+        metric("stage_cpu_seconds_total", "counter", "CPU time spent per stage.",
+               [(f'{{stage="{name}"}}', f"{t.cpu_seconds:.6f}") for name, t in stages])
+        metric("pattern_hits_total", "counter", "Boxes matched per pattern.",
+               [(f'{{pattern="{name}"}}', p.hits) for name, p in patterns])
+        metric("streams_rewritten_total", "counter", "Content streams rewritten.",
+               [("", self.streams)])
+        metric("stream_bytes_in_total", "counter", "Decoded bytes of rewritten streams before.",
+               [("", self.bytes_in)])
+        metric("stream_bytes_out_total", "counter", "Decoded bytes of rewritten streams after.",
+               [("", self.bytes_out)])
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: Union[str, Path], fmt: Optional[str] = None) -> None:
+        """Write the counters to ``path`` as ``"json"`` or ``"prometheus"``.
+
+        Without ``fmt`` the format follows the suffix: ``.prom`` means
+        Prometheus, anything else JSON.
+        """
+        path = Path(path)
+        if fmt is None:
+            fmt = "prometheus" if path.suffix == ".prom" else "json"
+        if fmt not in ("json", "prometheus"):
+            raise ValueError(f"Unknown metrics format: {fmt}")
+
+        path.write_text(self.to_prometheus() if fmt == "prometheus" else self.to_json() + "\n")
+        logger.info(f"Wrote processing metrics to {path}")
+
+
+class NullInstrumentation(Instrumentation):
+    """Instrumentation that records nothing, for use when metrics are off."""
+
+    enabled = False
+
+    def stage(self, name: str):
+        """Return a shared no-op context manager."""
+        return _NULL_STAGE
+
+    def add_stage(self, name: str, wall_seconds: float, cpu_seconds: float, calls: int = 1) -> None:
+        """Ignore the measurement."""
+
+    def record_stream(self, bytes_in: int, bytes_out: int) -> None:
+        """Ignore the stream."""
+
+    def record_pattern(self, name: str, hits: int) -> None:
+        """Ignore the hits."""
@@ -0,0 +1,91 @@
+"""Memory management policy for long processing runs."""
+import gc
+import os
+import sys
+import time
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def current_rss() -> Optional[int]:
+    """Return the resident set size of this process in bytes, if known."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+class GCPolicy:
+    """Runs a full garbage collection only when memory has grown enough.
+
+    Growth is measured from the level right after the previous collection,
+    either as resident set size or as the number of blocks held by the
+    Python allocator. A threshold of 0 collects on every check; None
+    disables that trigger.
+    """
+
+    def __init__(
+        self,
+        rss_threshold_mb: Optional[float] = 256,
+        allocation_threshold: Optional[int] = 1_000_000,
+    ):
+        """Initialize the policy with growth thresholds."""
+        self.rss_threshold = None if rss_threshold_mb is None else rss_threshold_mb * MB
+        self.allocation_threshold = allocation_threshold
+        self.checks = 0
+        self.collections = 0
+        self.gc_seconds = 0.0
+        self._mark()
+
+    def _mark(self) -> None:
+        """Remember the current memory levels as the new baseline."""
+        self._baseline_rss = current_rss() if self.rss_threshold is not None else None
+        self._baseline_blocks = sys.getallocatedblocks()
+
+    def should_collect(self) -> bool:
+        """Check whether a threshold has been crossed since the last collection."""
+        if self.allocation_threshold is not None:
+            if sys.getallocatedblocks() - self._baseline_blocks >= self.allocation_threshold:
+                return True
+
+        if self.rss_threshold is not None and self._baseline_rss is not None:
+            rss = current_rss()
+            if rss is not None and rss - self._baseline_rss >= self.rss_threshold:
+                return True
+
+        return False
+
+    def maybe_collect(self) -> bool:
+        """Collect if a threshold has been crossed; return whether it did."""
+        self.checks += 1
+        if not self.should_collect():
+            return False
+        self.collect()
+        return True
+
+    def collect(self) -> None:
+        """Run a full collection, timing it."""
+        start = time.perf_counter()
+        gc.collect()
+        self.gc_seconds += time.perf_counter() - start
+        self.collections += 1
+        self._mark()
+
+    def report(self) -> Dict[str, float]:
+        """Summarize how often and how long collection ran."""
+        return {
+            "checks": self.checks,
+            "collections": self.collections,
+            "gc_seconds": round(self.gc_seconds, 6),
+        }
@@ -0,0 +1,77 @@
+"""Edge cases of the content stream rectangle scanner."""
+
+import pytest
+
+from pdf_box_eraser.core.content_stream import ContentStreamRewriter, apply_spans, count_disjoint
+
+
+def rewrite(content: bytes) -> bytes:
+    """Remove every rectangle path the scanner finds."""
+    spans, _ = ContentStreamRewriter().find_spans(content)
+    return apply_spans(content, spans)
+
+
+@pytest.mark.parametrize("content", [
+    b"BT (0 0 10 10 re f) Tj ET",
+    b"BT (a \\) 0 0 10 10 re f) Tj ET",
+    b"BT (nested (0 0 1 1 re S) x) Tj ET",
+    b"% 0 0 10 10 re f\n1 0 0 RG",
+    b"BI /W 1 /H 1 /BPC 8 /CS /G ID \x00 0 0 1 1 re f EI Q",
+])
+def test_look_alikes_in_opaque_constructs_are_kept(content):
+    assert rewrite(content) == content
+
+
+@pytest.mark.parametrize("content, expected", [
+    (b"q 0 0 5 5 re f Q", b"q  Q"),
+    (b"0 0 5 5 re f*", b""),
+    (b"0 0 5 5 re 6 6 2 2 re B*", b""),
+    (b"(x) Tj 0 0 5 5 re S", b"(x) Tj "),
+    (b"BI /W 1 /H 1 ID \x00\xff EI 0 0 5 5 re f", b"BI /W 1 /H 1 ID \x00\xff EI "),
+])
+def test_painted_rectangles_are_removed(content, expected):
+    assert rewrite(content) == expected
+
+
+def test_mixed_path_keeps_its_paint_operator():
+    content = b"10 10 m 20 20 l 0 0 5 5 re S"
+    paths = list(ContentStreamRewriter().iter_paths(content))
+    assert [(path.kind, path.paint) for path in paths] == [("rect_run", b"S")]
+    assert rewrite(content) == b"10 10 m 20 20 l  S"
+
+
+def test_rectangle_before_other_path_operators_is_kept():
+    content = b"0 0 5 5 re 10 10 m 20 20 l S"
+    assert rewrite(content) == content
+
+
+def test_clipping_rectangle_goes_with_its_clip_operators():
+    content = b"0 0 100 100 re W n 0 0 5 5 re f"
+    paths = list(ContentStreamRewriter().iter_paths(content))
+    assert [path.paint for path in paths] == [b"n", b"f"]
+    assert rewrite(content) == b" "
+
+
+@pytest.mark.parametrize("content", [
+    b"0 0 5 5 re",
+    b"1 2 3 4 5 0 0 5 5 re f",
+    b"0 0 1 1 re 0 0 1 1 re 5 5 m",
+])
+def test_unpainted_or_malformed_rectangles_are_kept(content):
+    assert rewrite(content) == content
+
+
+def test_long_unpainted_run_then_painted_rectangle():
+    content = b"0 0 1 1 re " * 2000 + b"5 5 m 6 6 l S 0 0 9 9 re f"
+    assert rewrite(content) == b"0 0 1 1 re " * 2000 + b"5 5 m 6 6 l S "
+
+
+@pytest.mark.parametrize("spans, others, expected", [
+    ([(0, 5), (10, 15)], [], 2),
+    ([(0, 5), (10, 15)], [(5, 10)], 2),
+    ([(0, 5), (10, 15)], [(4, 6)], 1),
+    ([(0, 5), (10, 15)], [(0, 20)], 0),
+    ([(2, 3)], [(0, 1), (4, 5)], 1),
+])
+def test_count_disjoint_skips_spans_overlapping_others(spans, others, expected):
+    assert count_disjoint(spans, others) == expected
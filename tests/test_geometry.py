@@ -0,0 +1,97 @@
+"""Placement of rectangles on the page and the filters that select them."""
+
+import numpy as np
+import pytest
+
+from pdf_box_eraser.core.box_remover import BoxRemover
+from pdf_box_eraser.core.content_stream import ContentStreamRewriter
+from pdf_box_eraser.core.geometry import (
+    IDENTITY,
+    Placement,
+    RectFilter,
+    collect_rects,
+    drawn_names,
+    select,
+    walk_graphics_state,
+)
+
+PAGE = (0.0, 0.0, 612.0, 792.0)
+
+
+def rects_of(content: bytes, base=IDENTITY, stack=()):
+    """The rectangles the scanner finds, placed on the page."""
+    paths = list(ContentStreamRewriter().iter_paths(content))
+    return collect_rects(content, paths, base, stack)
+
+
+def remove(content: bytes, rect_filter: RectFilter, placements=None) -> bytes:
+    """Remove the rectangles ``rect_filter`` selects."""
+    return BoxRemover(rect_filter=rect_filter).remove_boxes(content, placements).content
+
+
+def test_cm_inside_q_applies_until_the_matching_Q():
+    rects = rects_of(b"q 2 0 0 2 100 100 cm 0 0 10 10 re f Q 0 0 10 10 re f")
+    np.testing.assert_allclose(rects.bbox, [[100, 100, 120, 120], [0, 0, 10, 10]])
+
+
+def test_state_carries_over_between_parts_of_contents():
+    first = walk_graphics_state(b"q 1 0 0 1 50 60 cm")
+    assert first.ctm == (1.0, 0.0, 0.0, 1.0, 50.0, 60.0)
+    assert first.stack == (IDENTITY,)
+
+    rects = rects_of(b"0 0 10 10 re f Q 0 0 10 10 re f", first.ctm, first.stack)
+    np.testing.assert_allclose(rects.bbox, [[50, 60, 60, 70], [0, 0, 10, 10]])
+
+
+def test_unbalanced_Q_keeps_the_current_matrix():
+    walk = walk_graphics_state(b"Q 1 0 0 1 5 5 cm Q")
+    assert walk.ctm == (1.0, 0.0, 0.0, 1.0, 5.0, 5.0)
+
+
+def test_do_calls_are_recorded_with_their_ctm():
+    walk = walk_graphics_state(b"q 2 0 0 2 0 0 cm /Fm0 Do Q /Im#201 Do (/Fake Do) Tj")
+    assert walk.invocations == [("/Fm0", (2.0, 0.0, 0.0, 2.0, 0.0, 0.0)), ("/Im 1", IDENTITY)]
+    assert {"/Fm0", "/Im 1"} <= drawn_names(b"q 2 0 0 2 0 0 cm /Fm0 Do Q /Im#201 Do")
+
+
+def test_partially_selected_path_keeps_its_paint_operator():
+    content = b"0 0 10 10 re 0 0 100 100 re f"
+    result = remove(content, RectFilter(min_area=1000))
+    assert result == b"0 0 10 10 re  f"
+
+
+def test_fully_selected_path_goes_with_its_paint_operator():
+    content = b"q 0 0 100 100 re 0 0 200 200 re f Q"
+    assert remove(content, RectFilter(min_area=1000)) == b"q  Q"
+
+
+def test_stroke_only_on_a_mixed_path_keeps_the_other_segments():
+    content = b"0 0 m 10 10 l 20 20 5 5 re S 0 0 5 5 re f"
+    result = remove(content, RectFilter(stroke_only=True))
+    assert result == b"0 0 m 10 10 l  S 0 0 5 5 re f"
+
+
+@pytest.mark.parametrize("mode, kept", [("exclude", b"0 0 10 10 re f"), ("only", b"300 400 10 10 re f")])
+def test_margin_modes_pick_opposite_rectangles(mode, kept):
+    content = b"0 0 10 10 re f\n300 400 10 10 re f"
+    result = remove(content, RectFilter(margin=36, margin_mode=mode), [Placement(page_box=PAGE)])
+    assert result.strip() == kept
+
+
+def test_aspect_is_long_side_over_short_side():
+    rects = rects_of(b"0 0 100 10 re f 0 0 10 100 re f 0 0 20 20 re f")
+    mask = select(rects, RectFilter(min_aspect=5))
+    assert mask.tolist() == [True, True, False]
+
+
+def test_form_drawn_at_two_placements_loses_only_rectangles_selected_at_both():
+    form = b"0 0 10 10 re f"
+    rect_filter = RectFilter(margin=36)
+    centre = Placement((1.0, 0.0, 0.0, 1.0, 300.0, 400.0), (), PAGE)
+    elsewhere = Placement((1.0, 0.0, 0.0, 1.0, 100.0, 100.0), (), PAGE)
+    corner = Placement(IDENTITY, (), PAGE)
+
+    assert remove(form, rect_filter, [centre, elsewhere]) == b""
+    assert remove(form, rect_filter, [centre, corner]) == form
+    # Unknown placements keep everything
+    assert remove(form, rect_filter, []) == form
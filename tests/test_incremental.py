@@ -0,0 +1,67 @@
+"""Incremental updates round-trip on every cross-reference layout."""
+
+import pikepdf
+import pytest
+
+from pdf_box_eraser.core.pdf_processor import PDFProcessor
+
+BOXED = b"q 0 0 1 RG 50 50 200 100 re S Q BT /F1 12 Tf 72 720 Td (Kept) Tj ET"
+PLAIN = b"BT /F1 12 Tf 72 720 Td (Untouched) Tj ET"
+
+LAYOUTS = {
+    "xref_table": dict(object_stream_mode=pikepdf.ObjectStreamMode.disable),
+    "xref_stream": dict(object_stream_mode=pikepdf.ObjectStreamMode.generate),
+    "linearized": dict(linearize=True),
+}
+
+
+def make_input(path, **save_options):
+    """Save a three page document: a boxed page, a plain page, a boxed form."""
+    pdf = pikepdf.Pdf.new()
+    form = pdf.make_stream(
+        b"0 0 10 10 re f", Type=pikepdf.Name.XObject, Subtype=pikepdf.Name.Form, BBox=[0, 0, 10, 10]
+    )
+    for content in (BOXED, PLAIN, b"/Fm0 Do"):
+        page = pdf.add_blank_page(page_size=(612, 792))
+        page.Contents = pdf.make_stream(content)
+        page.Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Fm0=form))
+    pdf.save(path, **save_options)
+
+
+@pytest.mark.parametrize("layout", sorted(LAYOUTS))
+def test_incremental_round_trip(tmp_path, layout):
+    source = tmp_path / "input.pdf"
+    target = tmp_path / "output.pdf"
+    make_input(source, **LAYOUTS[layout])
+    original = source.read_bytes()
+    with pikepdf.open(source) as pdf:
+        assert pdf.is_linearized == (layout == "linearized")
+
+    PDFProcessor().process_pdf_to_stream(str(source), str(target), incremental=True)
+
+    written = target.read_bytes()
+    assert written.startswith(original)
+    assert len(written) > len(original)
+    assert source.read_bytes() == original
+
+    with pikepdf.open(target) as pdf:
+        # Renamed from check() in pikepdf 9
+        check = getattr(pdf, "check_pdf_syntax", None) or pdf.check
+        assert check() == []
+        assert pdf.get_warnings() == []
+        pages = pdf.pages
+        assert len(pages) == 3
+        first = pages[0].Contents.read_bytes()
+        assert b" re " not in first and b"(Kept) Tj" in first
+        assert pages[1].Contents.read_bytes() == PLAIN
+        assert pages[2].Resources.XObject.Fm0.read_bytes().strip() == b""
+
+
+def test_incremental_update_refuses_to_overwrite_its_input(tmp_path):
+    source = tmp_path / "input.pdf"
+    make_input(source)
+    original = source.read_bytes()
+
+    with pytest.raises(ValueError):
+        PDFProcessor().process_pdf_to_stream(str(source), str(source), incremental=True)
+    assert source.read_bytes() == original
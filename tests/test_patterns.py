@@ -0,0 +1,54 @@
+"""Extra box patterns combined into one PatternSet."""
+
+import pytest
+
+from pdf_box_eraser.core.box_remover import BoxRemover, PatternSet
+
+
+def test_leading_flags_apply_only_to_their_own_pattern():
+    patterns = PatternSet([rb"(?i)foo", rb"BAR"])
+    assert patterns.search(b"FOO")
+    assert not patterns.search(b"bar")
+    assert patterns.find_spans(b"Foo BAR bar") == ([(0, 3), (4, 7)], 2)
+    assert patterns.hits == {"pattern_0": 1, "pattern_1": 1}
+
+
+def test_verbose_flag_comment_does_not_swallow_the_group():
+    patterns = PatternSet([rb"(?x) f o o  # spaced out", rb"baz"])
+    assert patterns.find_spans(b"foo baz")[1] == 2
+
+
+def test_backreference_is_matched_separately():
+    patterns = PatternSet([rb"(x)y", rb"(\d) \1 re"])
+    assert [index for index, _ in patterns._separate] == [1]
+    spans, count = patterns.find_spans(b"xy 1 1 re 1 2 re")
+    assert spans == [(0, 2), (3, 9)]
+    assert count == 2
+    assert patterns.hits == {"pattern_0": 1, "pattern_1": 1}
+
+
+def test_named_group_reference_is_matched_separately():
+    patterns = PatternSet([rb"(?P<n>a)(?P=n)"])
+    assert len(patterns._separate) == 1
+    assert patterns.find_spans(b"ab aa") == ([(3, 5)], 1)
+
+
+def test_identical_sources_are_added_once():
+    patterns = PatternSet([rb"foo", "foo", rb"bar"])
+    assert patterns.sources == [rb"foo", rb"bar"]
+    patterns.find_spans(b"foo")
+    assert patterns.hits == {"pattern_0": 1, "pattern_1": 0}
+
+
+def test_invalid_pattern_is_rejected():
+    with pytest.raises(ValueError):
+        PatternSet([rb"(unclosed"])
+
+
+def test_pattern_match_over_a_removed_rectangle_is_not_counted_again():
+    remover = BoxRemover(patterns=[rb"0 0 10 10 re f", rb"/Artifact BMC"])
+    result = remover.remove_boxes(b"0 0 10 10 re f /Artifact BMC EMC")
+    assert result.content == b"  EMC"
+    assert result.boxes == 2
+    assert result.hits == {"rect_path": 1, "pattern_0": 1, "pattern_1": 1}
+    assert remover.stats.boxes_removed == 2
@@ -0,0 +1,54 @@
+"""PDFProcessor reuse across documents."""
+
+import pikepdf
+
+from pdf_box_eraser.core.pdf_processor import PDFProcessor
+
+
+def make_input(path, text: bytes):
+    """Save a one page document with a stroked box around some text."""
+    pdf = pikepdf.Pdf.new()
+    page = pdf.add_blank_page(page_size=(612, 792))
+    page.Contents = pdf.make_stream(
+        b"q 50 50 200 100 re S Q BT /F1 12 Tf 72 720 Td (" + text + b") Tj ET"
+    )
+    pdf.save(path)
+
+
+def test_one_processor_handles_several_files(tmp_path):
+    processor = PDFProcessor()
+    for name in (b"first", b"second"):
+        source = tmp_path / f"{name.decode()}.pdf"
+        target = tmp_path / f"{name.decode()}_processed.pdf"
+        make_input(source, name)
+
+        processor.process_pdf_to_stream(str(source), str(target))
+
+        assert processor.box_remover.stats.pages_processed == 1
+        assert processor.box_remover.stats.boxes_removed == 1
+        with pikepdf.open(target) as pdf:
+            content = pdf.pages[0].Contents.read_bytes()
+        assert b" re " not in content and b"(" + name + b") Tj" in content
+
+
+def test_forms_are_followed_through_inherited_resources(tmp_path):
+    source = tmp_path / "forms.pdf"
+    pdf = pikepdf.Pdf.new()
+    form = dict(Type=pikepdf.Name.XObject, Subtype=pikepdf.Name.Form, BBox=[0, 0, 10, 10])
+    inner = pdf.make_stream(b"0 0 10 10 re f", **form)
+    # No /Resources of its own, so /Fm1 resolves in the page's resources
+    outer = pdf.make_stream(b"/Fm1 Do", **form)
+    unused = pdf.make_stream(b"0 0 5 5 re f", **form)
+    page = pdf.add_blank_page(page_size=(612, 792))
+    page.Contents = pdf.make_stream(b"/Fm0 Do")
+    page.Resources = pikepdf.Dictionary(
+        XObject=pikepdf.Dictionary(Fm0=outer, Fm1=inner, Unused=unused)
+    )
+    pdf.save(source)
+
+    processor = PDFProcessor()
+    with processor.process_pdf(str(source)) as processed:
+        xobjects = processed.pages[0].Resources.XObject
+        assert xobjects.Fm1.read_bytes() == b""
+        assert xobjects.Unused.read_bytes() == b"0 0 5 5 re f"
+    assert processor.box_remover.stats.boxes_removed == 1
@@ -0,0 +1,67 @@
+"""GridIndex queries checked against a brute-force scan."""
+
+import numpy as np
+import pytest
+
+from pdf_box_eraser.core.spatial import REGION_MODES, GridIndex
+
+
+def brute_force(bbox: np.ndarray, region, mode: str) -> np.ndarray:
+    """Indices of the boxes matching ``region``, checked one by one."""
+    x0, y0, x1, y1 = region
+    hits = []
+    for i, (bx0, by0, bx1, by1) in enumerate(bbox):
+        if mode == "contain":
+            hit = bx0 >= x0 and by0 >= y0 and bx1 <= x1 and by1 <= y1
+        else:
+            hit = bx0 <= x1 and bx1 >= x0 and by0 <= y1 and by1 >= y0
+        if hit:
+            hits.append(i)
+    return np.asarray(hits, dtype=np.int64)
+
+
+def random_boxes(rng: np.random.Generator, count: int) -> np.ndarray:
+    """Mostly small boxes on a page, a few huge ones and some degenerate ones."""
+    corner = rng.uniform(-50, 650, size=(count, 2))
+    size = rng.exponential(20, size=(count, 2))
+    size[rng.random(count) < 0.05] *= 40
+    size[rng.random(count) < 0.05] = 0
+    return np.hstack([corner, corner + size])
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("cell_size", [None, 1.0, 500.0])
+def test_query_matches_brute_force(seed, cell_size):
+    rng = np.random.default_rng(seed)
+    bbox = random_boxes(rng, 300)
+    index = GridIndex(bbox, cell_size)
+
+    regions = [tuple(corner) + tuple(corner + size) for corner, size in zip(
+        rng.uniform(-100, 700, size=(40, 2)), rng.exponential(80, size=(40, 2))
+    )]
+    regions += [(-1e6, -1e6, 1e6, 1e6), (300, 300, 300, 300), tuple(bbox[0])]
+    for region in regions:
+        for mode in REGION_MODES:
+            np.testing.assert_array_equal(index.query(region, mode), brute_force(bbox, region, mode))
+
+
+def test_mask_is_the_union_of_queries():
+    rng = np.random.default_rng(7)
+    bbox = random_boxes(rng, 200)
+    index = GridIndex(bbox)
+    regions = [(0, 0, 100, 100), (400, 500, 612, 792)]
+    expected = np.zeros(len(bbox), dtype=bool)
+    for region in regions:
+        expected[brute_force(bbox, region, "intersect")] = True
+    np.testing.assert_array_equal(index.mask(regions), expected)
+
+
+def test_empty_index_and_inverted_region():
+    assert len(GridIndex(np.empty((0, 4))).query((0, 0, 10, 10))) == 0
+    index = GridIndex(np.array([[0.0, 0.0, 5.0, 5.0]]))
+    assert len(index.query((10, 10, 0, 0))) == 0
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        GridIndex(np.array([[0.0, 0.0, 1.0, 1.0]])).query((0, 0, 1, 1), "touch")